@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Block 3 Region Locator for AC Brotherhood
+=========================================
+
+Shared locator for the region headers in SAV Block 3, used by the SAV
+parser, serializer, cape unlockers and compact format parser.
+
+Region Header (8 bytes):
+    | Offset | Size | Field                     |
+    |--------|------|---------------------------|
+    | 0x00   | 1    | Version (0x01)            |
+    | 0x01   | 3    | Declared size (24-bit LE) |
+    | 0x04   | 4    | Flags (00 00 80 00)       |
+
+Regions are laid out as [header 8B] [declared size bytes] [5-byte gap], so
+once a header is found the next one can only start after its data. Region 4
+is the exception: its declared size is Block 4's compressed size and only 5
+bytes of local data follow it.
+
+Candidates are found with bytes.find() on the flags and confirmed by the
+version byte and declared size, so the search jumps between headers instead
+of testing every byte.
+
+Main Functions:
+    iter_region_headers(data, start, end)  - Every 01 ?? ?? ?? 00 00 80 00 in range
+    find_block3_regions(data, start, end)  - Chained region table (cached, immutable)
+
+Usage:
+    from block3_regions import find_block3_regions
+
+    regions = find_block3_regions(data, block3_offset)
+    region4_offset, block4_compressed_size = regions[3]
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+REGION_VERSION = 0x01
+REGION_FLAGS = b'\x00\x00\x80\x00'
+REGION_HEADER_SIZE = 8
+REGION_GAP_SIZE = 5
+REGION_COUNT = 4
+
+# Declared sizes outside (0, MAX_REGION_SIZE) are false positives
+MAX_REGION_SIZE = 50000
+
+Region = namedtuple('Region', ['offset', 'size'])
+
+
+# =============================================================================
+# LOCATOR
+# =============================================================================
+
+def iter_region_headers(data, start: int = 0, end: int = None):
+    """
+    Yield every region header candidate in data[start:end].
+
+    A candidate is a 0x01 byte followed by any 3-byte size and the flags;
+    overlapping candidates are all reported. As in the original scans, a
+    header must start before end - 8.
+
+    Args:
+        data: bytes (other buffers are searched through a copy of the range)
+        start: First offset to consider
+        end: End of the searched range (default: len(data))
+
+    Yields:
+        Region(offset, declared_size), offsets relative to data
+    """
+    if end is None:
+        end = len(data)
+    if isinstance(data, bytes):
+        buf, base = data, 0
+    else:
+        # memoryview/bytearray/mmap slices: copy the range once for find()
+        buf, base = bytes(data[start:end]), start
+
+    limit = end - REGION_HEADER_SIZE - base
+    pos = start - base
+    find = buf.find
+    while True:
+        flags_at = find(REGION_FLAGS, pos + 4)
+        if flags_at == -1:
+            return
+        header = flags_at - 4
+        if header >= limit:
+            return
+        if buf[header] == REGION_VERSION:
+            yield Region(header + base, int.from_bytes(buf[header + 1:header + 4], 'little'))
+        pos = header + 1
+
+
+def find_block3_regions(data, start: int = 0, end: int = None,
+                        count: int = REGION_COUNT, max_size: int = MAX_REGION_SIZE) -> tuple:
+    """
+    Locate the chained region headers of Block 3.
+
+    Starting at start, takes the first candidate whose declared size is in
+    (0, max_size), then resumes after its data and 5-byte gap, until count
+    regions are found or the range is exhausted.
+
+    Results are cached by content, so repeated lookups on the same file
+    share one table; it is a tuple of Region tuples and cannot be modified.
+
+    Args:
+        data: Whole file or Block 3 (any buffer)
+        start: Block 3 offset in data
+        end: End of the searched range (default: len(data))
+        count: Number of regions to find
+        max_size: Exclusive upper bound on declared sizes
+
+    Returns:
+        Tuple of Region(offset, size), offsets relative to data; shorter
+        than count if not all regions were found
+    """
+    if end is None:
+        end = len(data)
+    if isinstance(data, bytes):
+        return _locate_regions(data, start, end, count, max_size)
+
+    regions = _locate_regions(bytes(data[start:end]), 0, end - start, count, max_size)
+    return tuple(Region(offset + start, size) for offset, size in regions)
+
+
+@lru_cache(maxsize=8)
+def _locate_regions(data: bytes, start: int, end: int, count: int, max_size: int) -> tuple:
+    regions = []
+    pos = start
+    while len(regions) < count:
+        for region in iter_region_headers(data, pos, end):
+            if 0 < region.size < max_size:
+                regions.append(region)
+                pos = region.offset + REGION_HEADER_SIZE + region.size + REGION_GAP_SIZE
+                break
+        else:
+            break
+    return tuple(regions)
@@ -22,13 +22,16 @@ Name structure in Block 1:
 
 import sys
 import os
+import re
 import struct
 import argparse
 
 # Import from existing tools
 from lzss_decompressor_final import LZSSDecompressor
 from lzss_compressor_final import compress_lzss_lazy
-from sav_serializer import adler32
+from checksum import adler32_zero_seed as adler32
+from header_codec import pack_header
+from block3_regions import find_block3_regions
 
 # Cape definitions: (hash, expected_id, name)
 CAPE_DEFINITIONS = [
@@ -166,19 +169,7 @@ def parse_sav_blocks(data: bytes) -> dict:
     block3_offset = block2_data_offset + block2_compressed_size
 
     # Find all 4 region headers in Block 3
-    block3_regions = []
-    search_pos = block3_offset
-    for region_num in range(4):
-        while search_pos < total_size - 8:
-            if (data[search_pos] == 0x01 and
-                data[search_pos+4:search_pos+8] == b'\x00\x00\x80\x00'):
-                region_size = struct.unpack('<I', data[search_pos+1:search_pos+4] + b'\x00')[0]
-                if 0 < region_size < 50000:
-                    block3_regions.append((search_pos, region_size))
-                    # Move past header + data + 5-byte gap
-                    search_pos = search_pos + 8 + region_size + 5
-                    break
-            search_pos += 1
+    block3_regions = find_block3_regions(data, block3_offset, total_size)
 
     # Region 4's declared size equals Block 4's compressed size
     if len(block3_regions) >= 4:
@@ -212,32 +203,54 @@ def parse_sav_blocks(data: bytes) -> dict:
     }
 
 
-def find_cape_in_block4(data: bytes, cape_hash: int, expected_id: int) -> int:
+def index_capes_in_block4(data: bytes, definitions=CAPE_DEFINITIONS) -> dict:
     """
-    Find a cape in Block 4 by searching for its hash.
+    Locate every cape in Block 4 in a single pass.
 
-    Returns the offset of the ownership flag, or -1 if not found.
-    Verifies the cape_id at hash_offset + 14 matches expected_id.
-    """
-    hash_bytes = struct.pack('<I', cape_hash)
-    pos = 0
+    All cape hashes are matched together (one regex alternation, with a
+    lookahead so overlapping hits are seen), applying the same cape_id check
+    as find_cape_in_block4. Flag writes do not move records, so the index
+    stays valid while Block 4 is edited.
 
-    while True:
-        pos = data.find(hash_bytes, pos)
-        if pos == -1:
-            return -1
+    Args:
+        data: Decompressed Block 4
+        definitions: (hash, expected_id, ...) entries, CAPE_DEFINITIONS by default
 
-        # Check if cape_id matches at expected offset
+    Returns:
+        {(cape_hash, expected_id): ownership flag offset} for each cape found
+    """
+    wanted = {}
+    for cape_hash, expected_id, *_ in definitions:
+        wanted.setdefault(cape_hash, []).append(expected_id)
+    if not wanted:
+        return {}
+
+    alternatives = b'|'.join(re.escape(struct.pack('<I', h)) for h in wanted)
+    pattern = re.compile(b'(?=(' + alternatives + b'))', re.DOTALL)
+
+    index = {}
+    for match in pattern.finditer(data):
+        pos = match.start()
         id_offset = pos + CAPE_ID_OFFSET
-        if id_offset < len(data):
-            actual_id = data[id_offset]
-            if actual_id == expected_id:
-                # Found it! Return ownership flag offset
-                return pos + OWNERSHIP_FLAG_OFFSET
+        if id_offset >= len(data):
+            continue
+        cape_hash = struct.unpack('<I', match.group(1))[0]
+        for expected_id in wanted[cape_hash]:
+            key = (cape_hash, expected_id)
+            if key not in index and data[id_offset] == expected_id:
+                index[key] = pos + OWNERSHIP_FLAG_OFFSET
+    return index
 
-        pos += 1
 
-    return -1
+def find_cape_in_block4(data: bytes, cape_hash: int, expected_id: int) -> int:
+    """
+    Find a cape in Block 4 by searching for its hash.
+
+    Returns the offset of the ownership flag, or -1 if not found.
+    Verifies the cape_id at hash_offset + 14 matches expected_id.
+    """
+    key = (cape_hash, expected_id)
+    return index_capes_in_block4(data, [key]).get(key, -1)
 
 
 def unlock_capes(sav_path: str, output_path: str, verbose: bool = False,
@@ -302,9 +315,10 @@ def unlock_capes(sav_path: str, output_path: str, verbose: bool = False,
     # Search for and unlock each cape (unless skipped)
     if not skip_capes:
         all_unlocked = True
+        cape_index = index_capes_in_block4(block4_data)
 
         for cape_hash, cape_id, cape_name in CAPE_DEFINITIONS:
-            flag_offset = find_cape_in_block4(block4_data, cape_hash, cape_id)
+            flag_offset = cape_index.get((cape_hash, cape_id), -1)
 
             if flag_offset == -1:
                 print(f"ERROR: {cape_name} not found in Block 4!")
@@ -342,7 +356,7 @@ def unlock_capes(sav_path: str, output_path: str, verbose: bool = False,
 
         # Build new Block 1 header
         block1_checksum = adler32(block1_recompressed)
-        block1_header = struct.pack('<11I',
+        block1_header = pack_header((
             0x00000016,              # Field1: Static value
             0x00FEDBAC,              # Field2: Magic marker
             len(block1_recompressed) + 32,  # Field3: compressed_size + 32
@@ -354,7 +368,7 @@ def unlock_capes(sav_path: str, output_path: str, verbose: bool = False,
             len(block1_recompressed),  # Compressed size
             len(block1_data),        # Uncompressed size (duplicate)
             block1_checksum          # Checksum
-        )
+        ))
         block1_header_and_data = block1_header + block1_recompressed
         total_size_diff += len(block1_recompressed) - len(block1_compressed)
     else:
@@ -25,67 +25,15 @@ Ownership flag is at hash_offset + 13, followed by cape_id at hash_offset + 14.
 
 import sys
 import os
+import re
 import struct
 import argparse
 
 # Import from existing tools
 from lzss_decompressor_final import LZSSDecompressor
 from lzss_compressor_final import compress_lzss_lazy
-
-
-# ============================================================================
-# PS3 CRC32 Checksum
-# ============================================================================
-
-def crc32_ps3(data: bytes) -> int:
-    """
-    Calculate CRC32 using PS3's custom parameters.
-
-    Parameters:
-        poly=0x04C11DB7
-        init=0xBAE23CD0
-        xorout=0xFFFFFFFF
-        refin=true (reflect input bytes)
-        refout=true (reflect output)
-
-    Args:
-        data: Bytes to checksum
-
-    Returns:
-        CRC32 checksum as 32-bit integer
-    """
-    crc = 0xBAE23CD0  # Custom initial value
-
-    for byte in data:
-        # Reflect input byte (reverse bits)
-        byte = int('{:08b}'.format(byte)[::-1], 2)
-        crc ^= (byte << 24)
-
-        for _ in range(8):
-            if crc & 0x80000000:
-                crc = ((crc << 1) ^ 0x04C11DB7) & 0xFFFFFFFF
-            else:
-                crc = (crc << 1) & 0xFFFFFFFF
-
-    # Reflect output (reverse all 32 bits)
-    crc = int('{:032b}'.format(crc)[::-1], 2)
-    # XOR with final value
-    return (crc ^ 0xFFFFFFFF) & 0xFFFFFFFF
-
-
-def adler32(data: bytes) -> int:
-    """
-    Calculate Adler-32 checksum using AC Brotherhood's zero-seed variant.
-    """
-    MOD_ADLER = 65521
-    s1 = 0
-    s2 = 0
-
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
-
-    return (s2 << 16) | s1
+from checksum import adler32_zero_seed as adler32, crc32_ps3
+from block3_regions import find_block3_regions
 
 
 # ============================================================================
@@ -234,19 +182,7 @@ def parse_ps3_sav_blocks(data: bytes) -> dict:
     b3_offset = b2_data_offset + b2_comp_size
 
     # Find all 4 region headers in Block 3
-    # Pattern: [01] [size 3B LE] [00 00 80 00]
-    block3_regions = []
-    search_pos = b3_offset
-    for region_num in range(4):
-        while search_pos < total_size - 8:
-            if (sav_data[search_pos] == 0x01 and
-                sav_data[search_pos+4:search_pos+8] == b'\x00\x00\x80\x00'):
-                region_size = struct.unpack('<I', sav_data[search_pos+1:search_pos+4] + b'\x00')[0]
-                if 0 < region_size < 50000:
-                    block3_regions.append((search_pos, region_size))
-                    search_pos = search_pos + 8 + region_size + 5
-                    break
-            search_pos += 1
+    block3_regions = find_block3_regions(sav_data, b3_offset, total_size)
 
     if len(block3_regions) < 4:
         raise ValueError(f"Could not parse Block 3 headers, found {len(block3_regions)} regions")
@@ -284,29 +220,53 @@ def parse_ps3_sav_blocks(data: bytes) -> dict:
     }
 
 
-def find_cape_in_block4(data: bytes, cape_hash: int, expected_id: int) -> int:
+def index_capes_in_block4(data: bytes, definitions=CAPE_DEFINITIONS) -> dict:
     """
-    Find a cape in Block 4 by searching for its hash.
+    Locate every cape in Block 4 in a single pass.
 
-    Returns the offset of the ownership flag, or -1 if not found.
-    """
-    hash_bytes = struct.pack('<I', cape_hash)  # Little-endian
-    pos = 0
+    All cape hashes are matched together (one regex alternation, with a
+    lookahead so overlapping hits are seen), applying the same cape_id check
+    as find_cape_in_block4. Flag writes do not move records, so the index
+    stays valid while Block 4 is edited.
 
-    while True:
-        pos = data.find(hash_bytes, pos)
-        if pos == -1:
-            return -1
+    Args:
+        data: Decompressed Block 4
+        definitions: (hash, expected_id, ...) entries, CAPE_DEFINITIONS by default
 
+    Returns:
+        {(cape_hash, expected_id): ownership flag offset} for each cape found
+    """
+    wanted = {}
+    for cape_hash, expected_id, *_ in definitions:
+        wanted.setdefault(cape_hash, []).append(expected_id)
+    if not wanted:
+        return {}
+
+    alternatives = b'|'.join(re.escape(struct.pack('<I', h)) for h in wanted)
+    pattern = re.compile(b'(?=(' + alternatives + b'))', re.DOTALL)
+
+    index = {}
+    for match in pattern.finditer(data):
+        pos = match.start()
         id_offset = pos + CAPE_ID_OFFSET
-        if id_offset < len(data):
-            actual_id = data[id_offset]
-            if actual_id == expected_id:
-                return pos + OWNERSHIP_FLAG_OFFSET
+        if id_offset >= len(data):
+            continue
+        cape_hash = struct.unpack('<I', match.group(1))[0]
+        for expected_id in wanted[cape_hash]:
+            key = (cape_hash, expected_id)
+            if key not in index and data[id_offset] == expected_id:
+                index[key] = pos + OWNERSHIP_FLAG_OFFSET
+    return index
 
-        pos += 1
 
-    return -1
+def find_cape_in_block4(data: bytes, cape_hash: int, expected_id: int) -> int:
+    """
+    Find a cape in Block 4 by searching for its hash.
+
+    Returns the offset of the ownership flag, or -1 if not found.
+    """
+    key = (cape_hash, expected_id)
+    return index_capes_in_block4(data, [key]).get(key, -1)
 
 
 # ============================================================================
@@ -328,7 +288,7 @@ def unlock_capes_ps3(sav_path: str, output_path: str, verbose: bool = False,
     # Verify PS3 checksum
     ps3_size = struct.unpack('>I', sav_data[0:4])[0]
     ps3_checksum_expected = struct.unpack('>I', sav_data[4:8])[0]
-    ps3_checksum_actual = crc32_ps3(sav_data[8:8 + ps3_size])
+    ps3_checksum_actual = crc32_ps3(memoryview(sav_data)[8:8 + ps3_size])
 
     if ps3_checksum_expected != ps3_checksum_actual:
         print(f"WARNING: PS3 checksum mismatch!")
@@ -371,9 +331,10 @@ def unlock_capes_ps3(sav_path: str, output_path: str, verbose: bool = False,
     # Search for and unlock capes
     if not skip_capes:
         all_unlocked = True
+        cape_index = index_capes_in_block4(block4_data)
 
         for cape_hash, cape_id, cape_name in CAPE_DEFINITIONS:
-            flag_offset = find_cape_in_block4(block4_data, cape_hash, cape_id)
+            flag_offset = cape_index.get((cape_hash, cape_id), -1)
 
             if flag_offset == -1:
                 print(f"ERROR: {cape_name} not found in Block 4!")
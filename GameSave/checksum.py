@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Checksum Library for AC Brotherhood
+===================================
+
+Shared checksum routines used by the OPTIONS and SAV tools.
+
+This is a single-purpose module for checksums only.
+It has no concept of file formats, sections, or serialization.
+
+Main Functions:
+    adler32_zero_seed(data) - Adler-32 (zero seed) of compressed sections
+    crc32_ps3(data)         - CRC32 of the PS3 file prefix
+
+Advanced Functions:
+    Adler32ZeroSeed         - Incremental Adler-32 (update()/digest())
+    adler32_combine(a, b, len_b) - Adler-32 of a concatenation from its parts
+    Crc32PS3                - Incremental CRC32 (update()/digest())
+
+Usage:
+    from checksum import adler32_zero_seed, adler32_combine, crc32_ps3, Crc32PS3
+
+    # One-shot
+    checksum = adler32_zero_seed(compressed)
+    crc = crc32_ps3(data)
+
+    # Checksum of head + tail without rescanning either
+    checksum = adler32_combine(adler32_zero_seed(head), adler32_zero_seed(tail), len(tail))
+
+    # Incremental, without concatenating the segments first
+    crc = Crc32PS3()
+    crc.update(header)
+    crc.update(payload)
+    value = crc.digest()
+"""
+
+import zlib
+
+
+# =============================================================================
+# ADLER-32 (ZERO SEED)
+# =============================================================================
+#
+# The game uses Adler-32 with s1=0, s2=0 instead of the standard s1=1.
+# zlib.adler32() takes the starting value as its second argument, so a start
+# value of 0 gives exactly the game variant, with the modulo deferred over
+# NMAX-sized runs in C and no copy of memoryview/bytearray input.
+
+MOD_ADLER = 65521
+
+
+class Adler32ZeroSeed:
+    """
+    Incremental zero-seed Adler-32.
+
+    Feed segments with update() in order; digest() returns the same value
+    adler32_zero_seed() gives for their concatenation.
+    """
+
+    __slots__ = ('_value', '_length')
+
+    def __init__(self, data: bytes = b''):
+        self._value = 0
+        self._length = 0
+        if data:
+            self.update(data)
+
+    def update(self, data: bytes):
+        """Add data (any bytes-like object) to the checksum."""
+        self._value = zlib.adler32(data, self._value)
+        self._length += len(data)
+
+    def digest(self) -> int:
+        """Return the Adler-32 of all data fed so far as a 32-bit integer."""
+        return self._value
+
+    def __len__(self):
+        """Number of bytes fed so far (the len_b for adler32_combine())."""
+        return self._length
+
+    def copy(self):
+        """Return an independent copy of the current state."""
+        clone = Adler32ZeroSeed()
+        clone._value = self._value
+        clone._length = self._length
+        return clone
+
+
+def adler32_zero_seed(data: bytes) -> int:
+    """
+    Calculate Adler-32 checksum with zero seed (AC Brotherhood variant).
+
+    Standard Adler-32 uses s1=1, s2=0. This game uses s1=0, s2=0.
+    Used for validating compressed data integrity.
+
+    Args:
+        data: Bytes to checksum (any bytes-like object)
+
+    Returns:
+        Adler-32 checksum as 32-bit integer (zero seed variant)
+    """
+    return zlib.adler32(data, 0)
+
+
+def adler32_combine(adler_a: int, adler_b: int, len_b: int) -> int:
+    """
+    Combine zero-seed Adler-32 values of two adjacent segments.
+
+    With a zero seed, every running s1 inside b is offset by s1(a), so s2
+    of the whole is s2(a) + s2(b) + len_b * s1(a).
+
+    Args:
+        adler_a: adler32_zero_seed() of the first segment
+        adler_b: adler32_zero_seed() of the second segment
+        len_b: Length of the second segment in bytes
+
+    Returns:
+        adler32_zero_seed() of the concatenated segments
+    """
+    s1_a = adler_a & 0xFFFF
+    s1 = (s1_a + (adler_b & 0xFFFF)) % MOD_ADLER
+    s2 = ((adler_a >> 16) + (adler_b >> 16) + len_b % MOD_ADLER * s1_a) % MOD_ADLER
+    return (s2 << 16) | s1
+
+
+# =============================================================================
+# PS3 CRC32
+# =============================================================================
+#
+# PS3 parameters: poly=0x04C11DB7, init=0xBAE23CD0, xorout=0xFFFFFFFF,
+#                 refin=true, refout=true
+#
+# With reflected input and output this is the standard reflected CRC-32
+# (the one zlib implements, table-driven in C) started from the bit-reversed
+# init value. zlib keeps its register complemented between calls, so the
+# seed passed to zlib.crc32() is reflect32(0xBAE23CD0) ^ 0xFFFFFFFF, and
+# zlib's final complement is the PS3 xorout.
+
+CRC32_PS3_INIT = 0xBAE23CD0
+_CRC32_PS3_SEED = int('{:032b}'.format(CRC32_PS3_INIT)[::-1], 2) ^ 0xFFFFFFFF
+
+
+class Crc32PS3:
+    """
+    Incremental PS3 CRC32.
+
+    Feed segments with update() in order; digest() returns the same value
+    crc32_ps3() gives for their concatenation and can be called at any time.
+    """
+
+    __slots__ = ('_value',)
+
+    def __init__(self, data: bytes = b''):
+        self._value = _CRC32_PS3_SEED
+        if data:
+            self.update(data)
+
+    def update(self, data: bytes):
+        """Add data (any bytes-like object) to the checksum."""
+        self._value = zlib.crc32(data, self._value)
+
+    def digest(self) -> int:
+        """Return the CRC32 of all data fed so far as a 32-bit integer."""
+        return self._value
+
+    def copy(self):
+        """Return an independent copy of the current state."""
+        clone = Crc32PS3()
+        clone._value = self._value
+        return clone
+
+
+def crc32_ps3(data: bytes) -> int:
+    """
+    Calculate CRC32 using PS3's custom parameters.
+    Used for the PS3 file prefix.
+
+    Args:
+        data: Bytes to checksum (any bytes-like object)
+
+    Returns:
+        CRC32 checksum as 32-bit integer
+    """
+    return zlib.crc32(data, _CRC32_PS3_SEED)
@@ -46,6 +46,7 @@ import json
 from dataclasses import dataclass, field
 from typing import List, Dict, Tuple, Optional, Any, Union
 from enum import Enum, auto
+from block3_regions import iter_region_headers
 
 
 # =============================================================================
@@ -429,16 +430,14 @@ class CompactFormatParser:
         Returns list of (offset, header) tuples.
         """
         headers = []
-        pos = 0
-        while pos < len(data) - 8:
-            header = CompactHeader.parse(data, pos)
-            if header:
-                headers.append((pos, header))
-                # Skip past header and look for next one
-                # Don't skip the entire declared size since it may not be accurate
-                pos += 8
-            else:
-                pos += 1
+        next_pos = 0
+        for offset, _ in iter_region_headers(data):
+            if offset < next_pos:
+                continue
+            headers.append((offset, CompactHeader.parse(data, offset)))
+            # Skip past header and look for next one
+            # Don't skip the entire declared size since it may not be accurate
+            next_pos = offset + 8
         return headers
 
     def find_inter_region_gaps(self, data: bytes) -> List[InterRegionGap]:
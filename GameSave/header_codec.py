@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Header Codec for AC Brotherhood
+===============================
+
+Shared codec for the 44-byte header in front of every LZSS-compressed
+OPTIONS section and SAV block, used by the OPTIONS and SAV tools.
+
+This module only knows the header layout. Which values go in fields 0-3
+depends on the section or block and is left to the callers.
+
+Header Layout (11 x uint32):
+    | Offset | Field             | PC | PS3 |
+    |--------|-------------------|----|-----|
+    | 0x00   | field0            | LE | BE  |
+    | 0x04   | field1            | LE | BE  |
+    | 0x08   | field2            | LE | BE  |
+    | 0x0C   | field3            | LE | LE  |
+    | 0x10   | magic1-magic4     | LE | LE  |
+    | 0x20   | compressed_size   | LE | LE  |
+    | 0x24   | uncompressed_size | LE | LE  |
+    | 0x28   | checksum          | LE | LE  |
+
+Main Functions:
+    unpack_header(data, offset, platform) - Decode a header in place (no slicing)
+    pack_header(fields, platform)         - Encode a header to 44 bytes
+
+Usage:
+    from header_codec import HEADER_SIZE, Header, MAGIC_FIELDS, pack_header, unpack_header
+
+    header = unpack_header(data, header_offset, 'PS3')
+    start = header_offset + HEADER_SIZE
+    payload = data[start:start + header.compressed_size]
+
+    raw = pack_header(Header(0x16, 0x00FEDBAC, 0xC5, len(data), *MAGIC_FIELDS,
+                             len(compressed), len(data), checksum), 'PC')
+"""
+
+import struct
+from collections import namedtuple
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+HEADER_SIZE = 44
+
+# Fields 4-7, identical in every header
+MAGIC1 = 0x57FBAA33
+MAGIC2 = 0x1004FA99
+MAGIC3 = 0x00020001
+MAGIC4 = 0x01000080
+MAGIC_FIELDS = (MAGIC1, MAGIC2, MAGIC3, MAGIC4)
+
+Header = namedtuple('Header', [
+    'field0', 'field1', 'field2', 'field3',
+    'magic1', 'magic2', 'magic3', 'magic4',
+    'compressed_size', 'uncompressed_size', 'checksum',
+])
+
+
+# =============================================================================
+# LAYOUTS
+# =============================================================================
+#
+# PC headers are little-endian throughout and decode in a single
+# unpack_from. PS3 headers store fields 0-2 big-endian; a struct format has
+# one byte order, so they are two runs over the same buffer.
+
+_PC_LAYOUT = struct.Struct('<11I')
+_PS3_HEAD = struct.Struct('>3I')
+_PS3_TAIL = struct.Struct('<8I')
+
+
+# =============================================================================
+# CODEC
+# =============================================================================
+
+def unpack_header(data, offset: int = 0, platform: str = 'PC') -> Header:
+    """
+    Decode the header at offset without copying it out of data.
+
+    Args:
+        data: Any buffer (bytes, bytearray, memoryview, mmap)
+        offset: Header start
+        platform: 'PC' or 'PS3'
+
+    Returns:
+        Header
+
+    Raises:
+        struct.error: If fewer than HEADER_SIZE bytes follow offset
+    """
+    if platform == 'PS3':
+        return Header._make(_PS3_HEAD.unpack_from(data, offset) +
+                            _PS3_TAIL.unpack_from(data, offset + 12))
+    return Header._make(_PC_LAYOUT.unpack_from(data, offset))
+
+
+def pack_header(fields, platform: str = 'PC') -> bytes:
+    """
+    Encode a header.
+
+    Args:
+        fields: Header (or any sequence of 11 ints in Header order)
+        platform: 'PC' or 'PS3'
+
+    Returns:
+        HEADER_SIZE bytes
+    """
+    if platform == 'PS3':
+        return _PS3_HEAD.pack(*fields[:3]) + _PS3_TAIL.pack(*fields[3:])
+    return _PC_LAYOUT.pack(*fields)
@@ -11,11 +11,20 @@ It has no concept of file formats, sections, or serialization.
 
 Main Functions:
     compress(data)     - Compress data using LZSS with lazy matching
+    compress(data, level='fast' | 'best') - Faster or smaller, not game-exact
     decompress(data)   - Decompress LZSS data
+    decompress_into(data, buffer) - Decompress into a preallocated buffer
 
 Advanced Functions:
     compress_with_debug(data)  - Returns (compressed, decisions, scenario1_count)
+                                 (plus a stats dict with with_stats=True)
+    compress_incremental(old, decisions, new) - Recompress an edited buffer
     LZSSDecompressor           - Class-based decompressor with more control
+    decompress_stream(chunks)  - Generator decompressor with bounded memory
+    LZSSStreamCompressor       - feed()/flush() compressor with bounded memory
+    compress_stream(chunks)    - Generator compressor with bounded memory
+    plan_compression(buffers, budget) - Cheapest per-buffer levels that fit a size
+    CompressionCache           - compress() memoized in memory and optionally on disk
 
 Usage:
     from lzss import compress, decompress
@@ -25,13 +34,99 @@ Usage:
 
     # Decompress data
     decompressed = decompress(compressed)
+
+    # Decompress into a buffer of the size stated in the header
+    decompressed = decompress(compressed, expected_size=header_size)
+
+    # Decompress chunk by chunk, keeping only the 8 KB match window
+    for piece in decompress_stream(iter(lambda: f.read(65536), b'')):
+        out.write(piece)
+
+    # Compress chunk by chunk (same output as compress())
+    for piece in compress_stream(iter(lambda: f.read(65536), b'')):
+        out.write(piece)
+
+    # Smallest output; decodes the same, but only level='exact' (the default)
+    # reproduces the game's own bytes
+    compressed = compress(data, level='best')
+
+    # Compressed bytes plus the Adler-32 the header needs
+    compressed, checksum = compress(data, with_checksum=True)
+
+    # Parse in chunks across 4 processes (same output)
+    compressed = compress(data, workers=4)
+
+    # Skip compression for content seen before (this run or, with a
+    # directory, earlier runs)
+    cache = CompressionCache('~/.cache/acb-lzss')
+    compressed, checksum = cache.compress(data, with_checksum=True)
+
+    # Recompress after a small edit, reusing the previous parse
+    compressed, decisions, _ = compress_with_debug(data)
+    compressed, decisions, _ = compress_incremental(data, decisions, edited)
 """
 
+import hashlib
+import os
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from checksum import adler32_zero_seed
+
 
 # =============================================================================
 # DECOMPRESSION
 # =============================================================================
 
+# Most output one compressed byte can produce: a long match's length grows by
+# 255 per extra 0x00 length byte. Caps buffers sized from untrusted headers.
+_MAX_EXPANSION = 255
+
+
+def _reserve(output, needed: int, growable: bool) -> int:
+    """
+    Make room for `needed` bytes of output and return the new capacity.
+
+    Growable outputs (bytearray) are doubled; a fixed buffer raises ValueError.
+    """
+    if not growable:
+        raise ValueError(
+            f"LZSS stream overruns output buffer ({needed} > {len(output)} bytes)")
+    output.extend(bytes(max(needed - len(output), len(output), 256)))
+    return len(output)
+
+
+def _copy_match(output, out_pos: int, distance: int, length: int) -> int:
+    """
+    Write a back-reference at out_pos and return the new output position.
+
+    Same result as copying one byte at a time: positions before the start of
+    the buffer read as zeros, and a match that overlaps its own output
+    repeats the last `distance` bytes.
+    """
+    src_pos = out_pos - distance
+
+    if src_pos < 0:
+        zeros = min(-src_pos, length)
+        output[out_pos:out_pos + zeros] = bytes(zeros)
+        out_pos += zeros
+        length -= zeros
+        src_pos += zeros
+
+    if length <= 0:
+        return out_pos
+
+    if distance >= length:
+        output[out_pos:out_pos + length] = output[src_pos:src_pos + length]
+    else:
+        pattern = bytes(output[src_pos:out_pos])
+        output[out_pos:out_pos + length] = (
+            pattern * (length // distance) + pattern[:length % distance])
+    return out_pos + length
+
+
 class LZSSDecompressor:
     """
     LZSS Decompressor matching AC Brotherhood's exact format.
@@ -43,20 +138,56 @@ class LZSSDecompressor:
     - Terminator: Long match with offset=0 (bytes 0x20 0x00)
     """
 
-    def decompress(self, compressed: bytes) -> bytes:
+    def decompress(self, compressed: bytes, expected_size: int = None):
         """
         Decompress LZSS data.
 
         Args:
             compressed: Compressed bytes
+            expected_size: Uncompressed size from the section/block header.
+                If given, output is written into a buffer of this size
+                (capped at what the stream could possibly decode to) and
+                ValueError is raised as soon as the stream overruns it.
 
         Returns:
             Decompressed bytes
         """
+        if expected_size is not None:
+            output = bytearray(min(expected_size, _MAX_EXPANSION * len(compressed)))
+            written = self._decode(compressed, output, growable=False)
+            del output[written:]
+            return bytes(output)
+
         if not compressed:
             return b''
 
         output = bytearray()
+        written = self._decode(compressed, output, growable=True)
+        del output[written:]
+        return bytes(output)
+
+    def decompress_into(self, compressed: bytes, out_buffer) -> int:
+        """
+        Decompress LZSS data into a preallocated buffer.
+
+        Args:
+            compressed: Compressed bytes
+            out_buffer: Writable bytes-like object (bytearray, memoryview, ...)
+
+        Returns:
+            Number of bytes written
+
+        Raises:
+            ValueError: If the stream decodes to more bytes than out_buffer holds
+        """
+        if not isinstance(out_buffer, bytearray):
+            out_buffer = memoryview(out_buffer).cast('B')
+        return self._decode(compressed, out_buffer, growable=False)
+
+    def _decode(self, compressed: bytes, output, growable: bool) -> int:
+        """Decode into output starting at 0; returns the number of bytes written."""
+        out_pos = 0
+        capacity = len(output)
         in_ptr = 0
         flags = 0
         flag_bits = 0
@@ -78,7 +209,10 @@ class LZSSDecompressor:
                 # Literal byte
                 if in_ptr >= len(compressed):
                     break
-                output.append(compressed[in_ptr])
+                if out_pos >= capacity:
+                    capacity = _reserve(output, out_pos + 1, growable)
+                output[out_pos] = compressed[in_ptr]
+                out_pos += 1
                 in_ptr += 1
             else:
                 # Match - read second flag bit
@@ -108,18 +242,8 @@ class LZSSDecompressor:
 
                     if in_ptr >= len(compressed):
                         break
-                    offset_byte = compressed[in_ptr]
+                    distance = compressed[in_ptr] + 1
                     in_ptr += 1
-
-                    distance = offset_byte + 1
-                    src_pos = len(output) - distance
-
-                    for _ in range(length):
-                        if src_pos < 0:
-                            output.append(0)
-                        else:
-                            output.append(output[src_pos])
-                        src_pos += 1
                 else:
                     # Long match (length 3+, offset 0-8191)
                     if in_ptr + 1 >= len(compressed):
@@ -151,30 +275,205 @@ class LZSSDecompressor:
                     else:
                         length = len_field + 2
 
-                    src_pos = len(output) - distance
+                if out_pos + length > capacity:
+                    capacity = _reserve(output, out_pos + length, growable)
+                out_pos = _copy_match(output, out_pos, distance, length)
 
-                    for _ in range(length):
-                        if src_pos < 0:
-                            output.append(0)
-                        else:
-                            output.append(output[src_pos])
-                        src_pos += 1
-
-        return bytes(output)
+        return out_pos
 
 
-def decompress(data: bytes) -> bytes:
+def decompress(data: bytes, expected_size: int = None):
     """
     Decompress LZSS data.
 
     Args:
         data: Compressed bytes
+        expected_size: Optional uncompressed size from the header
+            (see LZSSDecompressor.decompress)
 
     Returns:
         Decompressed bytes
     """
     decompressor = LZSSDecompressor()
-    return decompressor.decompress(data)
+    return decompressor.decompress(data, expected_size)
+
+
+def decompress_into(data: bytes, out_buffer) -> int:
+    """
+    Decompress LZSS data into a preallocated buffer.
+
+    Args:
+        data: Compressed bytes
+        out_buffer: Writable bytes-like object sized from the header
+
+    Returns:
+        Number of bytes written (ValueError if out_buffer is too small)
+    """
+    decompressor = LZSSDecompressor()
+    return decompressor.decompress_into(data, out_buffer)
+
+
+class LZSSStreamDecompressor:
+    """
+    Incremental LZSS decompressor with bounded memory.
+
+    Compressed input is fed in arbitrary chunks; each feed() returns the
+    output decoded so far. Only the last WINDOW_SIZE output bytes (the
+    farthest a long match can reach back) and the bytes of one incomplete
+    token are kept between calls. The concatenated output equals
+    decompress() of the concatenated input.
+    """
+
+    WINDOW_SIZE = 8192
+
+    def __init__(self):
+        self._window = bytearray()  # Recent output; the tail is not yet returned
+        self._emitted = 0           # Bytes of _window already returned
+        self._pending = b''         # Start of a token split across chunks
+        self._flags = 0
+        self._flag_bits = 0
+        self.total_out = 0
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> bytes:
+        """
+        Decode another chunk of compressed input.
+
+        Returns:
+            Newly decoded output (may be empty)
+        """
+        if self.finished:
+            return b''
+
+        data = self._pending + bytes(chunk) if self._pending else chunk
+        in_ptr = self._decode(data)
+        self._pending = bytes(data[in_ptr:]) if not self.finished else b''
+
+        window = self._window
+        output = bytes(window[self._emitted:])
+        self.total_out += len(output)
+        if len(window) > 2 * self.WINDOW_SIZE:
+            del window[:-self.WINDOW_SIZE]
+        self._emitted = len(window)
+        return output
+
+    def _decode(self, compressed) -> int:
+        """Decode whole tokens into the window; returns input bytes consumed."""
+        window = self._window
+        flags = self._flags
+        flag_bits = self._flag_bits
+        in_ptr = 0
+        in_len = len(compressed)
+
+        while in_ptr < in_len:
+            # Token start: roll back to here if the token is incomplete
+            token_ptr, token_flags, token_bits = in_ptr, flags, flag_bits
+
+            if flag_bits < 1:
+                flags = compressed[in_ptr]
+                in_ptr += 1
+                flag_bits = 8
+
+            flag_bit = flags & 1
+            flags >>= 1
+            flag_bits -= 1
+
+            if flag_bit == 0:
+                # Literal byte
+                if in_ptr >= in_len:
+                    break
+                window.append(compressed[in_ptr])
+                in_ptr += 1
+                continue
+
+            # Match - read second flag bit
+            if flag_bits < 1:
+                if in_ptr >= in_len:
+                    break
+                flags = compressed[in_ptr]
+                in_ptr += 1
+                flag_bits = 8
+
+            flag_bit2 = flags & 1
+            flags >>= 1
+            flag_bits -= 1
+
+            if flag_bit2 == 0:
+                # Short match (length 2-5, offset 1-256)
+                if flag_bits < 2:
+                    if in_ptr >= in_len:
+                        break
+                    flags |= compressed[in_ptr] << flag_bits
+                    in_ptr += 1
+                    flag_bits += 8
+
+                length = (flags & 3) + 2
+                flags >>= 2
+                flag_bits -= 2
+
+                if in_ptr >= in_len:
+                    break
+                distance = compressed[in_ptr] + 1
+                in_ptr += 1
+            else:
+                # Long match (length 3+, offset 0-8191)
+                if in_ptr + 1 >= in_len:
+                    break
+
+                byte1 = compressed[in_ptr]
+                byte2 = compressed[in_ptr + 1]
+                in_ptr += 2
+
+                distance = (byte2 << 5) | (byte1 & 0x1F)
+
+                # Check for terminator (distance == 0)
+                if distance == 0:
+                    self.finished = True
+                    return in_ptr
+
+                len_field = byte1 >> 5
+                if len_field == 0:
+                    # Variable length encoding
+                    length = 9
+                    while in_ptr < in_len and compressed[in_ptr] == 0:
+                        in_ptr += 1
+                        length += 255
+                    if in_ptr >= in_len:
+                        break
+                    length += compressed[in_ptr]
+                    in_ptr += 1
+                else:
+                    length = len_field + 2
+
+            # Until the window is first trimmed, window positions are absolute
+            # positions, so references before the start still zero-fill
+            _copy_match(window, len(window), distance, length)
+        else:
+            self._flags, self._flag_bits = flags, flag_bits
+            return in_ptr
+
+        # Incomplete token: keep its bytes for the next chunk
+        self._flags, self._flag_bits = token_flags, token_bits
+        return token_ptr
+
+
+def decompress_stream(chunks):
+    """
+    Decompress LZSS data arriving in chunks.
+
+    Args:
+        chunks: Iterable of compressed byte chunks (e.g. file reads)
+
+    Yields:
+        Non-empty chunks of decompressed output
+    """
+    decompressor = LZSSStreamDecompressor()
+    for chunk in chunks:
+        output = decompressor.feed(chunk)
+        if output:
+            yield output
+        if decompressor.finished:
+            break
 
 
 # =============================================================================
@@ -189,18 +488,60 @@ class _HashChainMatchFinder:
     - 14-bit hash from 3-byte window
     - Hash chain linking positions with same hash
     - Maximum chain depth of 2048 (matches game behavior)
+    - Most recent position of every 2-byte pair for the short-match fallback
+    - Start of the byte run each position lies in, to skip runs in O(1)
     """
 
     HASH_SIZE = 16384  # 0x3FFF + 1 (14-bit hash)
     MAX_CHAIN_DEPTH = 2048  # Game appears to use ~2000-2048
     GOOD_ENOUGH_LEN = 2048
+    MAX_OFFSET = 8192  # Largest distance a long match can encode
+    RING_SIZE = 8192  # Slots in the per-position rings (at least MAX_OFFSET)
+    CHAIN_MASK = RING_SIZE - 1
+    PAIR_SIZE = 65536  # One slot per 2-byte value
+    MAX_SHORT_OFFSET = 256  # Farthest the 2-byte fallback looks back
 
-    def __init__(self, data):
+    def __init__(self, data, start_pos=0):
+        """
+        Args:
+            data: Buffered input (with the 2-byte zero prefix)
+            start_pos: First position to insert into the hash chains.
+                Positions before it are never offered as candidates, which is
+                only safe when every query is at least MAX_OFFSET past it.
+        """
         self.data = data
         self.data_len = len(data)
         self.hash_head = [-1] * self.HASH_SIZE
-        self.chain_link = [-1] * self.data_len
-        self.current_pos = 0
+        # A link is only followed from a candidate within MAX_OFFSET of the
+        # query, and its slot is reused RING_SIZE positions later, so the ring
+        # gives the same chains as one slot per input byte.
+        self.chain_link = [-1] * self.RING_SIZE
+        self.last_pair = [-1] * self.PAIR_SIZE
+        self.run_start_at = [-1] * self.RING_SIZE  # Ring, like chain_link
+        self.run_start = start_pos
+        self.current_pos = start_pos
+
+    def extend(self, chunk):
+        """Append more input (streaming use; data must be a bytearray)."""
+        self.data += chunk
+        self.data_len = len(self.data)
+
+    def discard(self, count):
+        """
+        Drop the first `count` bytes and renumber every position by -count.
+
+        count must be a multiple of RING_SIZE (so ring slots stay aligned)
+        and leave at least MAX_OFFSET + 2 bytes before current_pos, so no
+        candidate a later query can reach is lost.
+        """
+        del self.data[:count]
+        self.data_len = len(self.data)
+        self.current_pos -= count
+        self.hash_head = [pos - count if pos >= count else -1 for pos in self.hash_head]
+        self.chain_link = [pos - count if pos >= count else -1 for pos in self.chain_link]
+        self.last_pair = [pos - count if pos >= count else -1 for pos in self.last_pair]
+        self.run_start_at = [pos - count if pos >= count else -1 for pos in self.run_start_at]
+        self.run_start -= count
 
     def _compute_hash(self, pos):
         """Compute 14-bit hash from 3 bytes at position."""
@@ -223,8 +564,13 @@ class _HashChainMatchFinder:
         while self.current_pos < pos:
             if self.current_pos + 2 < self.data_len:
                 h = self._compute_hash(self.current_pos)
-                self.chain_link[self.current_pos] = self.hash_head[h]
+                self.chain_link[self.current_pos & self.CHAIN_MASK] = self.hash_head[h]
                 self.hash_head[h] = self.current_pos
+                key = (self.data[self.current_pos] << 8) | self.data[self.current_pos + 1]
+                self.last_pair[key] = self.current_pos
+                if self.current_pos > 0 and self.data[self.current_pos] != self.data[self.current_pos - 1]:
+                    self.run_start = self.current_pos
+                self.run_start_at[self.current_pos & self.CHAIN_MASK] = self.run_start
             self.current_pos += 1
 
     def find_match(self, pos, max_match_length=2048):
@@ -243,17 +589,60 @@ class _HashChainMatchFinder:
         max_length = min(max_match_length, self.data_len - pos)
         chain_count = 0
 
+        # Inside a run of one byte value, note the value and how far the run
+        # reaches (capped at max_length) for the run skipping below
+        run_byte = None
+        if self.current_pos == pos and pos + 2 < self.data_len:
+            run_byte = self.data[pos]
+            if self.data[pos + 1] == run_byte and self.data[pos + 2] == run_byte:
+                run_reach = 3
+                while (run_reach < max_length and
+                       self.data[pos + run_reach] == run_byte):
+                    run_reach += 1
+            else:
+                run_byte = None
+
         # Walk hash chain for 3+ byte matches
         while candidate >= 0 and chain_count < self.MAX_CHAIN_DEPTH:
             chain_count += 1
 
             offset = pos - candidate
 
-            # Check offset limits and prevent self-matches (offset <= 0)
-            if offset <= 0 or offset > 8192 or candidate < 2:
-                candidate = self.chain_link[candidate] if candidate < len(self.chain_link) else -1
+            # Chains run newest first, so every later candidate is out of range too
+            if offset > self.MAX_OFFSET:
+                break
+
+            # Prevent self-matches (offset <= 0) and matches into the zero prefix
+            if offset <= 0 or candidate < 2:
+                candidate = self.chain_link[candidate & self.CHAIN_MASK]
                 continue
 
+            next_candidate = None
+            if (run_byte is not None and
+                    self.data[candidate] == run_byte and
+                    self.data[candidate + 1] == run_byte and
+                    self.data[candidate + 2] == run_byte):
+                # candidate is the newest position of a run of run_byte, and the
+                # chain continues through every position of that run. All of
+                # them reach the same distance into the run at pos, so their
+                # lengths follow from the run bounds: only the first candidate
+                # that reaches run_reach can beat the rest. Evaluate that one
+                # and count the others as walked.
+                run_first = self.run_start_at[candidate & self.CHAIN_MASK]
+                lowest = max(run_first, pos - self.MAX_OFFSET,
+                             candidate + chain_count - self.MAX_CHAIN_DEPTH)
+                chain_count += candidate - lowest
+                if lowest == run_first:
+                    next_candidate = self.chain_link[run_first & self.CHAIN_MASK]
+                else:
+                    next_candidate = -1  # Out of range or chain depth
+
+                if candidate != pos - 1:
+                    # An older run ends at candidate + 3
+                    target = candidate + 3 - run_reach
+                    candidate = max(lowest, 2, min(target, candidate))
+                    offset = pos - candidate
+
             # Quick rejection checks
             match_possible = True
             if best_length >= 2:
@@ -287,54 +676,80 @@ class _HashChainMatchFinder:
                     if best_length >= max_length or best_length >= self.GOOD_ENOUGH_LEN:
                         break
 
-            candidate = self.chain_link[candidate] if candidate < len(self.chain_link) else -1
+            if next_candidate is not None:
+                candidate = next_candidate
+            else:
+                candidate = self.chain_link[candidate & self.CHAIN_MASK]
 
-        # 2-byte match scan for short matches
+        # 2-byte match for short matches: the nearest earlier occurrence of
+        # the pair, which is the first hit of a scan over offsets 1-256
         if best_length < 2 and pos + 1 < self.data_len:
-            b0 = self.data[pos]
-            b1 = self.data[pos + 1]
+            check_pos = self.last_pair[(self.data[pos] << 8) | self.data[pos + 1]]
+            offset = pos - check_pos
 
-            max_scan = min(256, pos - 2)
-            for offset in range(1, max_scan + 1):
-                check_pos = pos - offset
-                if check_pos < 2:
-                    break
-                if self.data[check_pos] == b0 and self.data[check_pos + 1] == b1:
-                    length = 2
-                    while (length < max_length and
-                           pos + length < self.data_len and
-                           check_pos + length < self.data_len and
-                           self.data[check_pos + length] == self.data[pos + length]):
-                        length += 1
-
-                    if length > best_length:
-                        best_length = length
-                        best_offset = offset
-                        break
-
-        return best_length, best_offset
+            if check_pos >= 2 and offset <= self.MAX_SHORT_OFFSET:
+                length = 2
+                while (length < max_length and
+                       pos + length < self.data_len and
+                       self.data[check_pos + length] == self.data[pos + length]):
+                    length += 1
 
+                best_length = length
+                best_offset = offset
 
-def _add_bit(output, bit_accum, bit_counter, flag_byte_ptr, bit_value):
-    """Add single bit to output stream."""
-    old_bit_counter = bit_counter
+        return best_length, best_offset
 
-    if bit_counter == 0:
-        flag_byte_ptr = len(output)
-        output.append(0)
 
-    bit_counter += 1
-    bit_accum |= (bit_value & 1) << (old_bit_counter & 0x1f)
+class _BitWriter:
+    """
+    Output buffer plus flag-bit state for the LZSS encoder.
 
-    if bit_counter > 7:
-        output[flag_byte_ptr] = bit_accum & 0xFF
-        bit_accum >>= 8
-        bit_counter -= 8
-        if bit_counter > 0:
-            flag_byte_ptr = len(output)
-            output.append(0)
+    Flag bits are packed LSB first into a flag byte that is reserved in the
+    output when its first bit is written, ahead of the data bytes of that
+    token. A token's flag bits are written with one call.
+    """
 
-    return output, bit_accum, bit_counter, flag_byte_ptr
+    __slots__ = ('output', 'bit_accum', 'bit_counter', 'flag_byte_ptr')
+
+    def __init__(self):
+        self.output = bytearray()
+        self.bit_accum = 0
+        self.bit_counter = 0
+        self.flag_byte_ptr = 0
+
+    def write_bits(self, value, count):
+        """Append `count` (at most 8) flag bits, least significant first."""
+        bit_counter = self.bit_counter
+        if bit_counter == 0:
+            self.flag_byte_ptr = len(self.output)
+            self.output.append(0)
+
+        bit_accum = self.bit_accum | (value << bit_counter)
+        bit_counter += count
+
+        if bit_counter > 7:
+            self.output[self.flag_byte_ptr] = bit_accum & 0xFF
+            bit_accum >>= 8
+            bit_counter -= 8
+            if bit_counter > 0:
+                self.flag_byte_ptr = len(self.output)
+                self.output.append(0)
+
+        self.bit_accum = bit_accum
+        self.bit_counter = bit_counter
+
+    def flush(self):
+        """Write the last, partially filled flag byte."""
+        if self.bit_counter > 0:
+            self.output[self.flag_byte_ptr] = ((1 << self.bit_counter) - 1) & self.bit_accum
+
+    def take(self) -> bytes:
+        """Remove and return the output before the flag byte still being filled."""
+        ready = self.flag_byte_ptr if self.bit_counter else len(self.output)
+        taken = bytes(self.output[:ready])
+        del self.output[:ready]
+        self.flag_byte_ptr = self.flag_byte_ptr - ready if self.bit_counter else 0
+        return taken
 
 
 def _calculate_match_cost(length, offset):
@@ -348,42 +763,55 @@ def _calculate_match_cost(length, offset):
         return 18 + (extra_bytes * 8)
 
 
-def compress_with_debug(data: bytes) -> tuple:
+def _lazy_parse(buffered_data, find_match, pos, decisions, resync=None, end=None,
+                stats=None):
     """
-    Compress data using LZSS with lazy matching.
-
-    Returns detailed compression information for debugging.
+    Run the game's lazy-matching parse from pos, appending to decisions.
 
     Args:
-        data: Uncompressed bytes
+        buffered_data: Input with the 2-byte zero prefix
+        find_match: Callable returning (length, offset) for a position
+        pos: Position to start parsing at
+        decisions: List that ('L', byte) / ('M', length, offset) are appended to
+        resync: Optional {position: value} map; the parse stops as soon as it
+            reaches one of these positions
+        end: Optional position to stop before (default: end of the data)
+        stats: Optional dict; 'searches' and 'searches_saved' are added to it
 
     Returns:
-        Tuple of (compressed_bytes, decisions_list, scenario1_count)
-        - compressed_bytes: The compressed output
-        - decisions_list: List of ('L', byte) or ('M', length, offset) decisions
-        - scenario1_count: Number of Scenario 1 optimizations applied
+        Tuple of (position reached, resync value stopped at or None)
     """
-    # Add 2-byte zero prefix
-    buffered_data = bytearray([0x00, 0x00]) + bytearray(data)
-    match_finder = _HashChainMatchFinder(buffered_data)
-
-    output = bytearray()
-    bit_accum = 0
-    bit_counter = 0
-    flag_byte_ptr = 0
-    decisions = []
-    pos = 2
-
-    while pos < len(buffered_data):
-        curr_length, curr_offset = match_finder.find_match(pos)
+    data_len = len(buffered_data)
+    if end is None:
+        end = data_len
+
+    lookahead = None  # find_match(pos) carried over from the previous literal
+    searches = 0
+    searches_saved = 0
+    resumed = None
+
+    while pos < end:
+        if resync and pos in resync:
+            resumed = resync[pos]
+            break
+
+        if lookahead is not None:
+            curr_length, curr_offset = lookahead
+            lookahead = None
+            searches_saved += 1
+        else:
+            curr_length, curr_offset = find_match(pos)
+            searches += 1
 
         # Force literal at first position
         if pos == 2:
             curr_length = 0
 
         # Lazy matching
-        if curr_length >= 2 and pos + 1 < len(buffered_data):
-            next_length, next_offset = match_finder.find_match(pos + 1)
+        if curr_length >= 2 and pos + 1 < data_len:
+            next_length, next_offset = find_match(pos + 1)
+            searches += 1
+            lookahead = (next_length, next_offset)
 
             curr_is_short = (2 <= curr_length <= 5 and curr_offset <= 256)
             next_is_short = (2 <= next_length <= 5 and next_offset <= 256)
@@ -409,87 +837,845 @@ def compress_with_debug(data: bytes) -> tuple:
                 curr_length = 0
 
         if curr_length >= 2:
-            # Encode match
             decisions.append(('M', curr_length, curr_offset))
+            pos += curr_length
+            lookahead = None
+        else:
+            decisions.append(('L', buffered_data[pos]))
+            pos += 1
 
-            output, bit_accum, bit_counter, flag_byte_ptr = _add_bit(
-                output, bit_accum, bit_counter, flag_byte_ptr, 1)
+    if stats is not None:
+        stats['searches'] = stats.get('searches', 0) + searches
+        stats['searches_saved'] = stats.get('searches_saved', 0) + searches_saved
 
-            if 2 <= curr_length <= 5 and curr_offset <= 256:
-                # Short match
-                output, bit_accum, bit_counter, flag_byte_ptr = _add_bit(
-                    output, bit_accum, bit_counter, flag_byte_ptr, 0)
+    return pos, resumed
+
+
+# Smallest chunk worth a process: each chunk first replays MAX_OFFSET
+# positions into its hash chains
+_MIN_PARALLEL_CHUNK = _HashChainMatchFinder.MAX_OFFSET
+
+
+def _parse_range(data, start, end):
+    """
+    Run the lazy parse from start until it passes end, with its own finder.
+
+    Hash chains are started MAX_OFFSET before start (they are newest first,
+    so anything older could only be rejected as out of range) and
+    find_match() gives the same results as in a parse from position 0.
+
+    Returns:
+        Tuple of (positions, decisions, position reached, stats), where
+        positions[i] is the position decisions[i] starts at
+    """
+    finder = _HashChainMatchFinder(
+        data, start_pos=max(0, start - _HashChainMatchFinder.MAX_OFFSET))
+    decisions = []
+    stats = {}
+    reached, _ = _lazy_parse(data, finder.find_match, start, decisions, end=end, stats=stats)
+
+    positions = []
+    pos = start
+    for decision in decisions:
+        positions.append(pos)
+        pos += decision[1] if decision[0] == 'M' else 1
+    return positions, decisions, reached, stats
+
+
+def _parallel_lazy_parse(buffered_data, workers: int, stats: dict) -> list:
+    """
+    Run _lazy_parse over the whole input in chunks across processes.
+
+    The parse carries nothing from one decision to the next but its position
+    (the lookahead is only a cached find_match(pos + 1)), so once the real
+    parse lands on a position a chunk's speculative parse also started a
+    decision at, the rest of that chunk's decisions are the real ones. Each
+    chunk is parsed from its first byte in a worker; stitching then only
+    parses sequentially from where the previous chunk ended until it meets
+    one of the chunk's positions, usually within a few decisions.
 
-                len_bits = curr_length - 2
-                for i in range(2):
-                    output, bit_accum, bit_counter, flag_byte_ptr = _add_bit(
-                        output, bit_accum, bit_counter, flag_byte_ptr, (len_bits >> i) & 1)
+    Returns:
+        Decision list identical to a sequential _lazy_parse from position 2
+    """
+    data = bytes(buffered_data)
+    data_len = len(data)
+    chunk = max(-(-(data_len - 2) // workers), _MIN_PARALLEL_CHUNK)
+    starts = list(range(2, data_len, chunk))
+    ends = starts[1:] + [data_len]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = list(executor.map(_parse_range, [data] * len(starts), starts, ends))
+
+    decisions = []
+    pos = 2
+    for positions, part, reached, part_stats in parts:
+        for key, value in part_stats.items():
+            stats[key] = stats.get(key, 0) + value
+        if pos >= reached:
+            continue
+
+        index = {start: i for i, start in enumerate(positions)}
+        resumed = index.get(pos)
+        if resumed is None:
+            # Catch up until the real parse meets this chunk's parse
+            finder = _HashChainMatchFinder(
+                data, start_pos=max(0, pos - _HashChainMatchFinder.MAX_OFFSET))
+            pos, resumed = _lazy_parse(data, finder.find_match, pos, decisions,
+                                       resync=index, end=reached, stats=stats)
+            if resumed is None:
+                continue
+
+        decisions.extend(part[resumed:])
+        pos = reached
+
+    return decisions
+
+
+def _emit_decisions(writer, decisions):
+    """Append encoded decisions to a _BitWriter."""
+    write_bits = writer.write_bits
+    output = writer.output
 
+    for decision in decisions:
+        if decision[0] == 'M':
+            _, curr_length, curr_offset = decision
+
+            if 2 <= curr_length <= 5 and curr_offset <= 256:
+                # Short match: flags 1, 0, then the 2-bit length
+                write_bits(0b01 | ((curr_length - 2) << 2), 4)
                 output.append((curr_offset - 1) & 0xFF)
             else:
-                # Long match
-                output, bit_accum, bit_counter, flag_byte_ptr = _add_bit(
-                    output, bit_accum, bit_counter, flag_byte_ptr, 1)
+                # Long match: flags 1, 1
+                write_bits(0b11, 2)
 
                 if curr_length < 10:
-                    byte1 = ((curr_length - 2) << 5) | (curr_offset & 0x1F)
-                    byte2 = (curr_offset >> 5) & 0xFF
-                    output.append(byte1)
-                    output.append(byte2)
+                    output.append(((curr_length - 2) << 5) | (curr_offset & 0x1F))
+                    output.append((curr_offset >> 5) & 0xFF)
                 else:
-                    byte1 = curr_offset & 0x1F
-                    byte2 = (curr_offset >> 5) & 0xFF
-                    output.append(byte1)
-                    output.append(byte2)
+                    output.append(curr_offset & 0x1F)
+                    output.append((curr_offset >> 5) & 0xFF)
 
                     remaining = curr_length - 9
                     while remaining >= 0xFF:
                         output.append(0)
                         remaining -= 0xFF
                     output.append(remaining & 0xFF)
+        else:
+            # Literal: flag 0, then the byte
+            write_bits(0, 1)
+            output.append(decision[1])
 
-            pos += curr_length
+
+def _emit_terminator(writer):
+    """Append the terminator and flush the last, partially filled flag byte."""
+    writer.write_bits(0b11, 2)
+    writer.output.append(0x20)
+    writer.output.append(0x00)
+    writer.flush()
+
+
+def _encode_decisions(decisions) -> bytes:
+    """Encode a decision list (plus terminator) into the LZSS bit stream."""
+    writer = _BitWriter()
+    _emit_decisions(writer, decisions)
+    _emit_terminator(writer)
+    return bytes(writer.output)
+
+
+def compress_with_debug(data: bytes, workers: int = None, with_stats: bool = False) -> tuple:
+    """
+    Compress data using LZSS with lazy matching.
+
+    Returns detailed compression information for debugging.
+
+    Args:
+        data: Uncompressed bytes
+        workers: If greater than 1, split the parse into chunks across this
+            many processes (see _parallel_lazy_parse). Output is
+            byte-identical; inputs under two chunks of 16 KB are parsed
+            sequentially.
+        with_stats: Also return a dict of parse statistics as a fourth item
+
+    Returns:
+        Tuple of (compressed_bytes, decisions_list, scenario1_count[, stats])
+        - compressed_bytes: The compressed output
+        - decisions_list: List of ('L', byte) or ('M', length, offset) decisions
+        - scenario1_count: Number of Scenario 1 optimizations applied
+        - stats: {'searches': match searches run, 'searches_saved': searches
+          answered by the previous position's lazy-matching lookahead}; with
+          workers these include the chunks' speculative parses
+    """
+    # Add 2-byte zero prefix
+    buffered_data = bytearray(2)
+    buffered_data += data
+    decisions = []
+    stats = {'searches': 0, 'searches_saved': 0}
+    if workers is not None and workers > 1 and len(buffered_data) >= 2 * _MIN_PARALLEL_CHUNK:
+        decisions = _parallel_lazy_parse(buffered_data, workers, stats)
+    else:
+        find_match = _HashChainMatchFinder(buffered_data).find_match
+        _lazy_parse(buffered_data, find_match, 2, decisions, stats=stats)
+
+    if with_stats:
+        return _encode_decisions(decisions), decisions, 0, stats
+    return _encode_decisions(decisions), decisions, 0
+
+
+# A decision at pos reads find_match(pos) and find_match(pos + 1), and a
+# search never looks more than one maximum-length match past its position.
+_DECISION_LOOKAHEAD = 2 + 2048
+
+
+def _common_prefix_length(a, b) -> int:
+    """Length of the longest common prefix of two byte strings."""
+    a = memoryview(a)
+    b = memoryview(b)
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
         else:
-            # Encode literal
-            byte_val = buffered_data[pos]
-            decisions.append(('L', byte_val))
+            hi = mid - 1
+    return lo
+
+
+def compress_incremental(old_data: bytes, old_decisions: list, new_data: bytes) -> tuple:
+    """
+    Recompress data after an edit, reusing the previous parse where possible.
+
+    Decisions whose searches cannot see the first changed byte are kept as-is.
+    The parse resumes just before the edit and stops once it lands on the same
+    boundary as the old parse with a clean MAX_OFFSET window behind it, after
+    which the old decisions are reused again. The output is byte-identical to
+    compress_with_debug(new_data); a small edit costs roughly 10 KB of parsing
+    around the change instead of the whole payload.
+
+    Args:
+        old_data: Uncompressed bytes the old decisions were computed for
+        old_decisions: decisions_list from compress_with_debug(old_data)
+            (or from a previous compress_incremental call)
+        new_data: Edited uncompressed bytes
+
+    Returns:
+        Same tuple as compress_with_debug(new_data)
+    """
+    if old_data == new_data:
+        return _encode_decisions(old_decisions), list(old_decisions), 0
+
+    old_len = len(old_data)
+    new_len = len(new_data)
+
+    # Changed region, in buffered coordinates (2-byte zero prefix)
+    prefix_len = _common_prefix_length(old_data, new_data)
+    suffix_len = _common_prefix_length(old_data[::-1], new_data[::-1])
+    suffix_len = min(suffix_len, min(old_len, new_len) - prefix_len)
+    change_start = prefix_len + 2
+    change_end = new_len + 2 - suffix_len
+    shift = new_len - old_len
+
+    # Keep every decision made far enough before the change
+    decisions = []
+    resume_pos = 2
+    keep = 0
+    for decision in old_decisions:
+        if resume_pos + _DECISION_LOOKAHEAD >= change_start:
+            break
+        resume_pos += decision[1] if decision[0] == 'M' else 1
+        keep += 1
+    decisions.extend(old_decisions[:keep])
+
+    # Old decision boundaries the new parse may rejoin at
+    resync = {}
+    old_pos = resume_pos
+    for index in range(keep, len(old_decisions)):
+        new_pos = old_pos + shift
+        if new_pos - _HashChainMatchFinder.MAX_OFFSET >= change_end:
+            resync[new_pos] = index
+        decision = old_decisions[index]
+        old_pos += decision[1] if decision[0] == 'M' else 1
+
+    buffered_data = bytearray([0x00, 0x00]) + bytearray(new_data)
+    finder = _HashChainMatchFinder(
+        buffered_data,
+        start_pos=max(0, resume_pos - _HashChainMatchFinder.MAX_OFFSET))
+
+    _, resumed = _lazy_parse(buffered_data, finder.find_match, resume_pos, decisions, resync)
+    if resumed is not None:
+        decisions.extend(old_decisions[resumed:])
+
+    return _encode_decisions(decisions), decisions, 0
+
+
+COMPRESSION_LEVELS = ('exact', 'fast', 'best')
+
+
+class _EncodableMatchFinder(_HashChainMatchFinder):
+    """
+    Match finder for the 'fast' and 'best' levels.
+
+    The game-exact finder accepts offset 8192, which the 13-bit offset field
+    stores as 0 (the terminator). These levels stop at 8191.
+    """
+
+    MAX_OFFSET = 8191
+
+    def find_short_match(self, pos):
+        """
+        Nearest 2-5 byte match within MAX_SHORT_OFFSET (a 12-bit short match).
+
+        Must follow find_match(pos), which brings the pair index up to pos.
+        """
+        if pos + 1 >= self.data_len:
+            return 0, 0
+
+        check_pos = self.last_pair[(self.data[pos] << 8) | self.data[pos + 1]]
+        offset = pos - check_pos
+        if check_pos < 2 or offset > self.MAX_SHORT_OFFSET:
+            return 0, 0
+
+        length = 2
+        while (length < 5 and
+               pos + length < self.data_len and
+               self.data[check_pos + length] == self.data[pos + length]):
+            length += 1
+        return length, offset
+
+
+class _FastMatchFinder(_EncodableMatchFinder):
+    """Shallow-chain finder for the 'fast' level."""
+
+    MAX_CHAIN_DEPTH = 16
+
+
+def _encodable_length(length):
+    """
+    Largest match length <= length that the long-match encoding can represent.
+
+    Lengths 9 + 255k (k >= 1) would end their extension bytes with a zero,
+    which the decoder reads as another 255.
+    """
+    if length > 9 and (length - 9) % 255 == 0:
+        return length - 1
+    return length
+
+
+def _greedy_parse(buffered_data, find_match) -> list:
+    """Take the longest match wherever it beats literals (no lazy matching)."""
+    decisions = []
+    data_len = len(buffered_data)
+    pos = 2
+
+    while pos < data_len:
+        length, offset = find_match(pos)
 
-            output, bit_accum, bit_counter, flag_byte_ptr = _add_bit(
-                output, bit_accum, bit_counter, flag_byte_ptr, 0)
-            output.append(byte_val)
+        # Force literal at first position
+        if pos == 2:
+            length = 0
 
+        length = _encodable_length(length)
+        if length >= 2 and _calculate_match_cost(length, offset) < 9 * length:
+            decisions.append(('M', length, offset))
+            pos += length
+        else:
+            decisions.append(('L', buffered_data[pos]))
             pos += 1
 
-    # Terminator
-    output, bit_accum, bit_counter, flag_byte_ptr = _add_bit(
-        output, bit_accum, bit_counter, flag_byte_ptr, 1)
-    output, bit_accum, bit_counter, flag_byte_ptr = _add_bit(
-        output, bit_accum, bit_counter, flag_byte_ptr, 1)
+    return decisions
+
+
+_NICE_LENGTH = 32
+
+
+def _optimal_parse(buffered_data) -> list:
+    """
+    Find the token sequence with the fewest bits for the candidate matches.
+
+    Every position gets its longest match (see _NICE_LENGTH) and its
+    nearest short match, and every position the game-exact lazy parse stops
+    at also gets that parse's match. A backward pass then picks, for each
+    position, the cheapest of a literal or any usable length of those
+    matches followed by the cheapest encoding of the rest. The exact parse's
+    token sequence is one of those paths, so the result is never larger
+    than level 'exact' wherever that output is valid (the game's parse can
+    emit match lengths of 9 + 255k, which do not decode). Match costs come in tiers of equal cost:
+    - 2-5 bytes within 256: 12 bits
+    - 3-9 bytes: 18 bits
+    - 10-263, 265-518, ... bytes: 26, 34, ... bits
+
+    The cheapest end point within a tier is a sliding-window minimum. Each
+    tier above 9 bytes keeps its window in a monotonic stack.
+    """
+    data_len = len(buffered_data)
+    finder = _EncodableMatchFinder(buffered_data)
+
+    long_len = [0] * data_len
+    long_off = [0] * data_len
+    short_len = [0] * data_len
+    short_off = [0] * data_len
+    max_long = 0
+
+    # The exact parse's matches (offset 8192 aside, which it cannot encode
+    # either). The carry below skips searches, and with them candidates this
+    # parse would use; adding its matches keeps its path available.
+    exact_decisions = []
+    _lazy_parse(buffered_data, _HashChainMatchFinder(buffered_data).find_match, 2,
+                exact_decisions)
+    exact_len = [0] * data_len
+    exact_off = [0] * data_len
+    pos = 2
+    for decision in exact_decisions:
+        if decision[0] == 'M':
+            if decision[2] <= finder.MAX_OFFSET:
+                exact_len[pos] = decision[1]
+                exact_off[pos] = decision[2]
+                max_long = max(max_long, decision[1])
+            pos += decision[1]
+        else:
+            pos += 1
 
-    output.append(0x20)
-    output.append(0x00)
+    # Position 2 is always a literal. Inside a match longer than
+    # _NICE_LENGTH the rest of that match is taken as the next position's
+    # candidate without another search.
+    carry_len = 0
+    carry_off = 0
+    for pos in range(3, data_len):
+        if carry_len > _NICE_LENGTH:
+            finder.advance_to(pos)
+            carry_len -= 1
+            length, offset = carry_len, carry_off
+        else:
+            length, offset = finder.find_match(pos)
+            carry_len, carry_off = length, offset
+        if length >= 2:
+            long_len[pos] = length
+            long_off[pos] = offset
+            max_long = max(max_long, length)
+        length, offset = finder.find_short_match(pos)
+        if length:
+            short_len[pos] = length
+            short_off[pos] = offset
+
+    # [first length, last length, bits, stack of -end positions, stack head]
+    tiers = []
+    extra = 1
+    while 10 + 255 * (extra - 1) <= max_long:
+        tiers.append([10 + 255 * (extra - 1), 8 + 255 * extra, 18 + 8 * extra, [], 0])
+        extra += 1
+
+    cost = [0] * (data_len + 1)
+    match_len = [0] * data_len
+    match_off = [0] * data_len
+
+    for i in range(data_len - 1, 1, -1):
+        # Slide each tier's window of end positions to [i + first, i + last].
+        # Stacks hold -end, increasing; costs increase towards the top, so the
+        # cheapest end at or below a limit is the first entry that reaches it.
+        for tier in tiers:
+            stack = tier[3]
+            end = i + tier[0]
+            if end <= data_len:
+                end_cost = cost[end]
+                while len(stack) > tier[4] and cost[-stack[-1]] >= end_cost:
+                    stack.pop()
+                stack.append(-end)
+            head = tier[4]
+            while head < len(stack) and -stack[head] > i + tier[1]:
+                head += 1
+            if head > 4096 and 2 * head > len(stack):
+                del stack[:head]
+                head = 0
+            tier[4] = head
+
+        best = 9 + cost[i + 1]
+        best_len = 0
+        best_off = 0
+
+        length = short_len[i]
+        if length:
+            offset = short_off[i]
+            for l in range(2, length + 1):
+                if 12 + cost[i + l] < best:
+                    best, best_len, best_off = 12 + cost[i + l], l, offset
+
+        for length, offset in ((long_len[i], long_off[i]), (exact_len[i], exact_off[i])):
+            if not length:
+                continue
+            if offset <= 256:
+                for l in range(2, min(length, 5) + 1):
+                    if 12 + cost[i + l] < best:
+                        best, best_len, best_off = 12 + cost[i + l], l, offset
+            for l in range(3, min(length, 9) + 1):
+                if 18 + cost[i + l] < best:
+                    best, best_len, best_off = 18 + cost[i + l], l, offset
+            for first, last, bits, stack, head in tiers:
+                if length < first:
+                    break
+                index = bisect_left(stack, -(i + min(length, last)), head)
+                if index < len(stack) and bits + cost[-stack[index]] < best:
+                    end = -stack[index]
+                    best, best_len, best_off = bits + cost[end], end - i, offset
 
-    # Flush final bits
-    if bit_counter > 0:
-        output[flag_byte_ptr] = ((1 << bit_counter) - 1) & bit_accum
+        cost[i] = best
+        match_len[i] = best_len
+        match_off[i] = best_off
 
-    return bytes(output), decisions, 0
+    decisions = []
+    pos = 2
+    while pos < data_len:
+        length = match_len[pos]
+        if length:
+            decisions.append(('M', length, match_off[pos]))
+            pos += length
+        else:
+            decisions.append(('L', buffered_data[pos]))
+            pos += 1
+    return decisions
 
 
-def compress(data: bytes) -> bytes:
+def compress(data: bytes, workers: int = None, with_checksum: bool = False,
+             level: str = 'exact'):
     """
-    Compress data using LZSS with lazy matching.
+    Compress data using LZSS.
 
     Args:
         data: Uncompressed bytes
+        workers: Optional process count for a chunked parse
+            (see compress_with_debug; 'exact' level only). Scripts passing
+            workers > 1 need the usual `if __name__ == "__main__":` guard for
+            process pools.
+        with_checksum: Also return the zero-seed Adler-32 of the compressed
+            stream (the value section/block headers store)
+        level: One of COMPRESSION_LEVELS:
+            - 'exact': the game's lazy matching, byte-identical to the game's
+              own output. This is the only byte-exact level.
+            - 'fast': greedy matching over 16-deep hash chains, for throughput
+            - 'best': optimal parse over the candidate matches (see
+              _optimal_parse); never larger than 'exact', but not a global
+              optimum. The PS3 size fallback relies on this bound.
+            'fast' and 'best' produce different bytes than the game, but any
+            LZSSDecompressor (and the game) decodes them to the same data.
 
     Returns:
-        Compressed bytes
+        Compressed bytes, or (compressed_bytes, adler32) if with_checksum
     """
-    compressed, _, _ = compress_with_debug(data)
+    if level == 'exact':
+        compressed, _, _ = compress_with_debug(data, workers)
+    elif level in COMPRESSION_LEVELS:
+        buffered_data = bytearray(2)
+        buffered_data += data
+        if level == 'fast':
+            decisions = _greedy_parse(buffered_data, _FastMatchFinder(buffered_data).find_match)
+        else:
+            decisions = _optimal_parse(buffered_data)
+        compressed = _encode_decisions(decisions)
+    else:
+        raise ValueError(f"Unknown compression level {level!r} "
+                         f"(expected one of {', '.join(COMPRESSION_LEVELS)})")
+
+    if with_checksum:
+        return compressed, adler32_zero_seed(compressed)
     return compressed
 
 
+def plan_compression(buffers, budget: int = None, levels=('exact', 'best'),
+                     cache=None) -> list:
+    """
+    Compress buffers with the cheapest levels whose combined size fits a budget.
+
+    Every buffer is compressed at levels[0] first. While the combined
+    compressed size exceeds budget, the largest buffer that has a level left
+    is recompressed at its next level, so buffers that do not need it never
+    pay for the slower encoders. A result is only replaced if it got smaller.
+
+    Args:
+        buffers: Uncompressed byte buffers
+        budget: Maximum combined compressed size, or None for no limit
+        levels: COMPRESSION_LEVELS to try, cheapest first
+        cache: Optional CompressionCache to compress through
+
+    Returns:
+        One dict per buffer with 'level', 'compressed', 'checksum',
+        'levels_tried' and 'seconds' (time spent on it across all levels).
+        The total can still exceed budget once every buffer is at levels[-1].
+    """
+    compress_fn = cache.compress if cache is not None else compress
+
+    plan = []
+    for data in buffers:
+        start = perf_counter()
+        compressed, checksum = compress_fn(data, with_checksum=True, level=levels[0])
+        plan.append({
+            'level': levels[0],
+            'compressed': compressed,
+            'checksum': checksum,
+            'levels_tried': [levels[0]],
+            'seconds': perf_counter() - start,
+        })
+
+    if budget is None:
+        return plan
+
+    total = sum(len(entry['compressed']) for entry in plan)
+    while total > budget:
+        candidates = [i for i, entry in enumerate(plan)
+                      if len(entry['levels_tried']) < len(levels)]
+        if not candidates:
+            break
+        i = max(candidates, key=lambda i: len(plan[i]['compressed']))
+        entry = plan[i]
+        level = levels[len(entry['levels_tried'])]
+        start = perf_counter()
+        compressed, checksum = compress_fn(buffers[i], with_checksum=True, level=level)
+        entry['seconds'] += perf_counter() - start
+        entry['levels_tried'].append(level)
+        if len(compressed) < len(entry['compressed']):
+            total -= len(entry['compressed']) - len(compressed)
+            entry['level'] = level
+            entry['compressed'] = compressed
+            entry['checksum'] = checksum
+
+    return plan
+
+
+# Part of every CompressionCache key. Bump it whenever any level's output
+# changes, so stale cached bytes are never returned.
+COMPRESSOR_VERSION = 1
+
+
+class CompressionCache:
+    """
+    compress() memoized by content.
+
+    Entries are keyed by the SHA-256 of the input, the compression level and
+    COMPRESSOR_VERSION, so identical content is only compressed once. Results
+    are kept in an in-memory LRU and, if a directory is given, in one file
+    per entry there: the 4-byte Adler-32 of the compressed stream followed by
+    the stream. Files that fail that check are treated as misses and removed.
+    When the directory grows past max_disk_bytes the least recently used
+    files are deleted. compress()'s workers option does not change the
+    output, so it is not part of the key.
+    """
+
+    def __init__(self, directory: str = None, max_entries: int = 64,
+                 max_disk_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            directory: Optional on-disk store (created if missing)
+            max_entries: In-memory LRU capacity
+            max_disk_bytes: Size bound of the on-disk store
+        """
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.directory = None
+        self._disk_bytes = 0
+        if directory is not None:
+            self.directory = os.path.expanduser(directory)
+            os.makedirs(self.directory, exist_ok=True)
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.lzss'):
+                    self._disk_bytes += entry.stat().st_size
+
+    @staticmethod
+    def key(data: bytes, level: str = 'exact') -> str:
+        """Cache key for compressing data at level."""
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{digest}-{level}-v{COMPRESSOR_VERSION}"
+
+    def compress(self, data: bytes, workers: int = None, with_checksum: bool = False,
+                 level: str = 'exact'):
+        """Same as lzss.compress(), returning cached bytes for known content."""
+        key = self.key(data, level)
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+        else:
+            cached = self._load(key)
+            if cached is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                cached = compress(data, workers, with_checksum=True, level=level)
+                self._store(key, cached)
+            self._memory[key] = cached
+            if len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+        if with_checksum:
+            return cached
+        return cached[0]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.lzss')
+
+    def _load(self, key: str):
+        """Read an entry from disk; returns (compressed, checksum) or None."""
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            return None
+
+        checksum = int.from_bytes(raw[:4], 'little')
+        compressed = raw[4:]
+        if not compressed or adler32_zero_seed(compressed) != checksum:
+            self._remove(path)
+            return None
+        # Refresh the mtime so eviction sees this entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return compressed, checksum
+
+    def _store(self, key: str, entry: tuple) -> None:
+        """Write an entry to disk, then evict down to max_disk_bytes."""
+        if self.directory is None:
+            return
+        compressed, checksum = entry
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(checksum.to_bytes(4, 'little'))
+                f.write(compressed)
+            if os.path.exists(path):
+                self._disk_bytes -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            return
+        self._disk_bytes += 4 + len(compressed)
+
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the store fits its bound."""
+        entries = [entry for entry in os.scandir(self.directory)
+                   if entry.name.endswith('.lzss')]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        self._disk_bytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            size = entry.stat().st_size
+            if self._remove(entry.path):
+                self._disk_bytes -= size
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+class LZSSStreamCompressor:
+    """
+    Incremental LZSS compressor with bounded memory.
+
+    Input is fed in arbitrary chunks; each feed() returns the compressed
+    bytes that are final so far and flush() returns the rest, including the
+    terminator. Only the last MAX_OFFSET input bytes (the farthest a match
+    can reach back), the lookahead the lazy parse needs and one flag byte
+    group of output are kept between calls. The concatenated output equals
+    compress() of the concatenated input.
+    """
+
+    # Input appended per parse round, so one large chunk is not held twice
+    FEED_BLOCK = 2 * _HashChainMatchFinder.MAX_OFFSET
+
+    def __init__(self):
+        self._finder = _HashChainMatchFinder(bytearray(2))  # 2-byte zero prefix
+        self._pos = 2
+        self._writer = _BitWriter()
+        self.total_in = 0
+        self.finished = False
+
+    def feed(self, chunk) -> bytes:
+        """
+        Compress another chunk of input.
+
+        Returns:
+            Newly finished compressed output (may be empty)
+        """
+        if self.finished:
+            raise ValueError("feed() called after flush()")
+
+        chunk = memoryview(chunk).cast('B')
+        for start in range(0, len(chunk), self.FEED_BLOCK):
+            self._finder.extend(chunk[start:start + self.FEED_BLOCK])
+            # Decide only where both searches of the lazy parse see final data
+            self._parse(self._finder.data_len - _DECISION_LOOKAHEAD)
+        self.total_in += len(chunk)
+        return self._writer.take()
+
+    def flush(self) -> bytes:
+        """
+        Compress the remaining input and terminate the stream.
+
+        Returns:
+            The rest of the compressed output
+        """
+        if self.finished:
+            return b''
+
+        self._parse(None)
+        _emit_terminator(self._writer)
+        self.finished = True
+
+        output = bytes(self._writer.output)
+        self._writer = _BitWriter()
+        return output
+
+    def _parse(self, end):
+        """Parse up to end (None = all buffered input) and encode the decisions."""
+        finder = self._finder
+        if end is not None and self._pos >= end:
+            return
+
+        decisions = []
+        self._pos, _ = _lazy_parse(finder.data, finder.find_match, self._pos, decisions, end=end)
+        _emit_decisions(self._writer, decisions)
+
+        # Drop input no later search can reach, in whole chain-ring turns
+        excess = finder.current_pos - finder.MAX_OFFSET - 2
+        excess -= excess % finder.RING_SIZE
+        if excess >= self.FEED_BLOCK:
+            finder.discard(excess)
+            self._pos -= excess
+
+
+def compress_stream(chunks):
+    """
+    Compress data arriving in chunks.
+
+    Args:
+        chunks: Iterable of uncompressed byte chunks (e.g. file reads)
+
+    Yields:
+        Non-empty chunks of compressed output, ending with the terminator
+    """
+    compressor = LZSSStreamCompressor()
+    for chunk in chunks:
+        output = compressor.feed(chunk)
+        if output:
+            yield output
+    yield compressor.flush()
+
+
 # =============================================================================
 # COMMAND LINE INTERFACE
 # =============================================================================
@@ -517,6 +1703,11 @@ Examples:
     compress_parser.add_argument('input', help='Input file')
     compress_parser.add_argument('output', help='Output file')
     compress_parser.add_argument('--compare', '-c', help='File to compare against')
+    compress_parser.add_argument('--level', '-l', choices=COMPRESSION_LEVELS, default='exact',
+                                 help="'exact' matches the game byte for byte (default); "
+                                      "'fast' and 'best' trade that for speed or size")
+    compress_parser.add_argument('--stream', '-s', action='store_true',
+                                 help='Compress file to file with bounded memory (no statistics)')
 
     # Decompress command
     decompress_parser = subparsers.add_parser('decompress', help='Decompress a file')
@@ -525,17 +1716,48 @@ Examples:
 
     args = parser.parse_args()
 
-    if args.command == 'compress':
+    if args.command == 'compress' and args.level != 'exact':
+        with open(args.input, 'rb') as f:
+            data = f.read()
+
+        print(f"Compressing: {args.input} (level: {args.level})")
+        print(f"Input size: {len(data)} bytes")
+
+        compressed = compress(data, level=args.level)
+
+        print(f"Compressed size: {len(compressed)} bytes ({100*len(compressed)/len(data):.1f}%)")
+        with open(args.output, 'wb') as f:
+            f.write(compressed)
+        print(f"Wrote: {args.output}")
+
+    elif args.command == 'compress' and args.stream:
+        print(f"Compressing: {args.input}")
+
+        input_size = os.path.getsize(args.input)
+        compressed_size = 0
+        with open(args.input, 'rb') as f_in, open(args.output, 'wb') as f_out:
+            for piece in compress_stream(iter(lambda: f_in.read(65536), b'')):
+                f_out.write(piece)
+                compressed_size += len(piece)
+
+        print(f"Input size: {input_size} bytes")
+        print(f"Compressed size: {compressed_size} bytes")
+        print(f"Wrote: {args.output}")
+
+    elif args.command == 'compress':
         with open(args.input, 'rb') as f:
             data = f.read()
 
         print(f"Compressing: {args.input}")
         print(f"Input size: {len(data)} bytes")
 
-        compressed, decisions, s1_count = compress_with_debug(data)
+        compressed, decisions, s1_count, stats = compress_with_debug(
+            data, with_stats=True)
 
         print(f"Compressed size: {len(compressed)} bytes ({100*len(compressed)/len(data):.1f}%)")
         print(f"Scenario 1 optimizations: {s1_count}")
+        print(f"Match searches: {stats['searches']} "
+              f"({stats['searches_saved']} reused from lazy-matching lookahead)")
 
         if args.compare:
             try:
@@ -553,18 +1775,16 @@ Examples:
         print(f"Wrote: {args.output}")
 
     elif args.command == 'decompress':
-        with open(args.input, 'rb') as f:
-            data = f.read()
-
         print(f"Decompressing: {args.input}")
-        print(f"Compressed size: {len(data)} bytes")
+        print(f"Compressed size: {os.path.getsize(args.input)} bytes")
 
-        decompressed = decompress(data)
+        decompressed_size = 0
+        with open(args.input, 'rb') as f_in, open(args.output, 'wb') as f_out:
+            for piece in decompress_stream(iter(lambda: f_in.read(65536), b'')):
+                f_out.write(piece)
+                decompressed_size += len(piece)
 
-        print(f"Decompressed size: {len(decompressed)} bytes")
-
-        with open(args.output, 'wb') as f:
-            f.write(decompressed)
+        print(f"Decompressed size: {decompressed_size} bytes")
         print(f"Wrote: {args.output}")
 
     else:
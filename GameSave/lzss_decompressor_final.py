@@ -86,30 +86,7 @@ import struct
 
 # Import core LZSS functionality from shared module
 from lzss import LZSSDecompressor, decompress
-
-
-def adler32(data: bytes) -> int:
-    """
-    Calculate Adler-32 checksum using AC Brotherhood's non-standard variant.
-
-    The game uses Adler-32 with ZERO SEED (s1=0, s2=0) instead of the
-    standard Adler-32 seed (s1=1, s2=0).
-
-    Args:
-        data: Bytes to checksum
-
-    Returns:
-        Adler-32 checksum as 32-bit integer (zero seed variant)
-    """
-    MOD_ADLER = 65521
-    s1 = 0  # NON-STANDARD: standard Adler-32 uses s1=1
-    s2 = 0
-
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
-
-    return (s2 << 16) | s1
+from checksum import adler32_zero_seed as adler32
 
 
 class SectionHeader:
@@ -34,42 +34,19 @@ Usage:
 
 import sys
 import os
-import struct
 import argparse
 
 # Import LZSS compression from shared module
 from lzss import compress
-
-
-def adler32(data: bytes) -> int:
-    """
-    Calculate Adler-32 checksum using AC Brotherhood's non-standard variant.
-
-    The game uses Adler-32 with ZERO SEED (s1=0, s2=0) instead of the
-    standard Adler-32 seed (s1=1, s2=0).
-
-    Args:
-        data: Bytes to checksum
-
-    Returns:
-        Adler-32 checksum as 32-bit integer (zero seed variant)
-    """
-    MOD_ADLER = 65521
-    s1 = 0  # NON-STANDARD: standard Adler-32 uses s1=1
-    s2 = 0
-
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
-
-    return (s2 << 16) | s1
+from checksum import adler32_zero_seed as adler32
+from header_codec import MAGIC1, MAGIC2, MAGIC3, MAGIC4, pack_header
 
 
 # ============================================================================
 # SECTION HEADER CONSTRUCTION
 # ============================================================================
 
-def build_section_header(section_num, compressed_data, uncompressed_size):
+def build_section_header(section_num, compressed_data, uncompressed_size, checksum=None):
     """
     Build a complete section header using the correct 44-byte structure.
 
@@ -79,6 +56,7 @@ def build_section_header(section_num, compressed_data, uncompressed_size):
         section_num: Section number (1, 2, or 3)
         compressed_data: Compressed LZSS bytes (includes 4-byte prefix from LZSS encoder)
         uncompressed_size: Size of uncompressed data
+        checksum: Adler-32 of compressed_data if already known (computed otherwise)
 
     Returns:
         Complete 44-byte header bytes
@@ -100,17 +78,12 @@ def build_section_header(section_num, compressed_data, uncompressed_size):
     | 0x28   | Field7 | checksum         | checksum               | checksum               |
     """
     compressed_size = len(compressed_data)
-    checksum = adler32(compressed_data)
-
-    # Common magic values (fields 5-8) shared by all sections
-    MAGIC1 = 0x57FBAA33
-    MAGIC2 = 0x1004FA99
-    MAGIC3 = 0x00020001
-    MAGIC4 = 0x01000080
+    if checksum is None:
+        checksum = adler32(compressed_data)
 
     if section_num == 1:
         # Section 1 header
-        header = struct.pack('<11I',
+        header = pack_header((
             0x00000016,        # Field1: Static
             0x00FEDBAC,        # Field2: Static
             0x000000C5,        # Field3: Static
@@ -122,10 +95,10 @@ def build_section_header(section_num, compressed_data, uncompressed_size):
             compressed_size,   # Field5: Compressed size
             uncompressed_size, # Field6: Uncompressed size (duplicate)
             checksum           # Field7: Checksum
-        )
+        ))
     elif section_num == 2:
         # Section 2 header
-        header = struct.pack('<11I',
+        header = pack_header((
             compressed_size + 40, # Field1: Calculated
             0x00000003,           # Field2: Static
             0x11FACE11,           # Field3: Static
@@ -137,10 +110,10 @@ def build_section_header(section_num, compressed_data, uncompressed_size):
             compressed_size,      # Field5: Compressed size
             uncompressed_size,    # Field6: Uncompressed size (duplicate)
             checksum              # Field7: Checksum
-        )
+        ))
     elif section_num == 3:
         # Section 3 header
-        header = struct.pack('<11I',
+        header = pack_header((
             compressed_size + 40, # Field1: Calculated
             0x00000000,           # Field2: Static
             0x21EFFE22,           # Field3: Static
@@ -152,7 +125,7 @@ def build_section_header(section_num, compressed_data, uncompressed_size):
             compressed_size,      # Field5: Compressed size
             uncompressed_size,    # Field6: Uncompressed size (duplicate)
             checksum              # Field7: Checksum
-        )
+        ))
     else:
         raise ValueError(f"Invalid section number: {section_num}")
 
@@ -201,16 +174,13 @@ def serialize_options_file(section_files, output_file):
         print(f"  Uncompressed size: {uncompressed_size} bytes")
 
         # Compress the section
-        compressed_data = compress_lzss_lazy(uncompressed_data)
+        compressed_data, checksum = compress(uncompressed_data, with_checksum=True)
         compressed_size = len(compressed_data)
         print(f"  Compressed size: {compressed_size} bytes ({100*compressed_size/uncompressed_size:.1f}%)")
 
         # Build section header
-        header = build_section_header(section_num, compressed_data, uncompressed_size)
+        header = build_section_header(section_num, compressed_data, uncompressed_size, checksum)
         print(f"  Header size: {len(header)} bytes")
-
-        # Calculate checksum for verification
-        checksum = adler32(compressed_data)
         print(f"  Checksum: 0x{checksum:08X}")
 
         # Append to OPTIONS file
@@ -37,34 +37,13 @@ Header Structure (44 bytes, 11 x 4-byte fields):
 
 import sys
 import os
-import struct
+import mmap
 import argparse
 import json
 from lzss import LZSSDecompressor
-
-
-def adler32(data: bytes) -> int:
-    """
-    Calculate Adler-32 checksum using AC Brotherhood's non-standard variant.
-
-    The game uses Adler-32 with ZERO SEED (s1=0, s2=0) instead of the
-    standard Adler-32 seed (s1=1, s2=0).
-
-    Args:
-        data: Bytes to checksum
-
-    Returns:
-        Adler-32 checksum as 32-bit integer (zero seed variant)
-    """
-    MOD_ADLER = 65521
-    s1 = 0  # NON-STANDARD: standard Adler-32 uses s1=1
-    s2 = 0
-
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
-
-    return (s2 << 16) | s1
+from checksum import adler32_zero_seed as adler32
+from header_codec import HEADER_SIZE, unpack_header
+from block3_regions import find_block3_regions
 
 
 # =============================================================================
@@ -260,23 +239,41 @@ def print_known_types():
     print("=" * 80)
 
 
+# Little-endian byte patterns of the known type hashes (TABLE_ID_TO_TYPE only
+# maps to these), searched for directly instead of decoding every offset
+_TYPE_HASH_PATTERNS = [
+    (type_hash.to_bytes(4, 'little'), type_hash, type_name)
+    for type_hash, type_name in TYPE_HASHES.items()
+]
+
+
 def scan_for_type_hashes(data: bytes, label: str = "Block") -> list:
     """
     Scan binary data for known type hashes and return matches.
 
+    Each hash is located with bytes.find(), so the per-offset work runs in C
+    and Python only handles actual matches (at any alignment, overlapping
+    ones included).
+
     Args:
         data: Binary data to scan
         label: Label for output (e.g., "Block 2")
 
     Returns:
-        List of tuples (offset, type_hash, type_name)
+        List of tuples (offset, type_hash, type_name), by offset
     """
+    if not hasattr(data, 'find'):
+        # memoryview (e.g. a block sliced from the mapped file)
+        data = bytes(data)
+
     found_types = []
-    for i in range(len(data) - 3):
-        # Read 4 bytes as little-endian uint32
-        val = struct.unpack('<I', data[i:i+4])[0]
-        if val in TYPE_HASHES:
-            found_types.append((i, val, TYPE_HASHES[val]))
+    find = data.find
+    for pattern, type_hash, type_name in _TYPE_HASH_PATTERNS:
+        i = find(pattern)
+        while i != -1:
+            found_types.append((i, type_hash, type_name))
+            i = find(pattern, i + 1)
+    found_types.sort()
     return found_types
 
 
@@ -303,31 +300,45 @@ def print_found_types(found_types: list, max_display: int = 10):
         print(f"    {type_name:25s} (0x{type_hash:08X}) at {offset_str}")
 
 
+def map_input(path: str):
+    """
+    Map a file read-only instead of reading it into memory.
+
+    The returned mmap supports indexing, slicing, struct.unpack_from and
+    memoryview like bytes does, and only the pages that are actually touched
+    get loaded. Files that cannot be mapped (empty files, pipes, devices) are
+    read into memory instead.
+    """
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return f.read()
+
+
 class SavHeader:
     """Represents a 44-byte header from the savegame file"""
 
     def __init__(self, data: bytes, offset: int):
-        """Parse header from 44 bytes"""
-        if len(data) < 44:
-            raise ValueError(f"Header data too short: {len(data)} bytes")
+        """Parse header from the 44 bytes at offset in data"""
+        if len(data) < offset + HEADER_SIZE:
+            raise ValueError(f"Header data too short: {len(data) - offset} bytes")
 
         self.offset = offset
 
-        # Parse all 11 fields (4 bytes each)
-        self.field1 = struct.unpack('<I', data[0x00:0x04])[0]
-        self.field2 = struct.unpack('<I', data[0x04:0x08])[0]
-        self.field3 = struct.unpack('<I', data[0x08:0x0C])[0]
-        self.field4 = struct.unpack('<I', data[0x0C:0x10])[0]
+        # Parse all 11 fields (4 bytes each) in one pass
+        fields = unpack_header(data, offset)
+        self.field1, self.field2, self.field3, self.field4 = fields[0:4]
 
         # GUID (8 bytes as two 4-byte values)
-        self.guid_low = struct.unpack('<I', data[0x10:0x14])[0]
-        self.guid_high = struct.unpack('<I', data[0x14:0x18])[0]
+        self.guid_low = fields.magic1
+        self.guid_high = fields.magic2
 
-        self.magic3 = struct.unpack('<I', data[0x18:0x1C])[0]
-        self.magic4 = struct.unpack('<I', data[0x1C:0x20])[0]
-        self.compressed_size = struct.unpack('<I', data[0x20:0x24])[0]
-        self.uncompressed_size = struct.unpack('<I', data[0x24:0x28])[0]
-        self.checksum = struct.unpack('<I', data[0x28:0x2C])[0]
+        self.magic3 = fields.magic3
+        self.magic4 = fields.magic4
+        self.compressed_size = fields.compressed_size
+        self.uncompressed_size = fields.uncompressed_size
+        self.checksum = fields.checksum
 
     def __repr__(self):
         return (f"SavHeader(offset=0x{self.offset:04X}, "
@@ -361,8 +372,9 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
     if output_dir is None:
         output_dir = os.path.dirname(os.path.abspath(filepath))
 
-    with open(filepath, 'rb') as f:
-        data = f.read()
+    # Headers and blocks below are views into the mapped file, not copies
+    data = map_input(filepath)
+    view = memoryview(data)
 
     total_size = len(data)
     print("=" * 80)
@@ -382,8 +394,7 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
     print("-" * 80)
 
     block1_header_offset = 0x0000
-    block1_header_data = data[block1_header_offset:block1_header_offset + 44]
-    block1_header = SavHeader(block1_header_data, block1_header_offset)
+    block1_header = SavHeader(data, block1_header_offset)
 
     print(f"Header at offset: 0x{block1_header_offset:04X}")
     print(f"  Field1:           0x{block1_header.field1:08X}")
@@ -399,7 +410,7 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
 
     # Extract and decompress block 1 data
     block1_data_offset = 0x002C
-    block1_compressed = data[block1_data_offset:block1_data_offset + block1_header.compressed_size]
+    block1_compressed = view[block1_data_offset:block1_data_offset + block1_header.compressed_size]
 
     print(f"\nCompressed data at: 0x{block1_data_offset:04X}")
     print(f"Compressed size:    {len(block1_compressed)} bytes")
@@ -411,8 +422,12 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
     print(f"  Expected:  0x{block1_header.checksum:08X}")
     print(f"  Calculated: 0x{calculated_checksum:08X}")
 
-    # Decompress
-    block1_decompressed = decompressor.decompress(block1_compressed)
+    # Decompress into a buffer of the declared size; a stream that overruns it
+    # is decoded again without the limit so the mismatch is reported below
+    try:
+        block1_decompressed = decompressor.decompress(block1_compressed, block1_header.uncompressed_size)
+    except ValueError:
+        block1_decompressed = decompressor.decompress(block1_compressed)
     print(f"\nDecompressed size:  {len(block1_decompressed)} bytes")
     print(f"Expected size:      {block1_header.uncompressed_size} bytes")
     print(f"Size match:         {'PASS' if len(block1_decompressed) == block1_header.uncompressed_size else 'FAIL'}")
@@ -451,8 +466,7 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
     # Calculate Block 2 header offset dynamically based on Block 1 size
     # Block 2 header immediately follows Block 1 compressed data
     block2_header_offset = block1_data_offset + block1_header.compressed_size
-    block2_header_data = data[block2_header_offset:block2_header_offset + 44]
-    block2_header = SavHeader(block2_header_data, block2_header_offset)
+    block2_header = SavHeader(data, block2_header_offset)
 
     print(f"Header at offset: 0x{block2_header_offset:04X}")
     print(f"  Field1:           0x{block2_header.field1:08X}")
@@ -469,7 +483,7 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
     # Extract and decompress block 2 data
     # Block 2 data immediately follows Block 2 header (44 bytes after header start)
     block2_data_offset = block2_header_offset + 44
-    block2_compressed = data[block2_data_offset:block2_data_offset + block2_header.compressed_size]
+    block2_compressed = view[block2_data_offset:block2_data_offset + block2_header.compressed_size]
 
     print(f"\nCompressed data at: 0x{block2_data_offset:04X}")
     print(f"Compressed size:    {len(block2_compressed)} bytes")
@@ -481,8 +495,12 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
     print(f"  Expected:  0x{block2_header.checksum:08X}")
     print(f"  Calculated: 0x{calculated_checksum:08X}")
 
-    # Decompress
-    block2_decompressed = decompressor.decompress(block2_compressed)
+    # Decompress into a buffer of the declared size; a stream that overruns it
+    # is decoded again without the limit so the mismatch is reported below
+    try:
+        block2_decompressed = decompressor.decompress(block2_compressed, block2_header.uncompressed_size)
+    except ValueError:
+        block2_decompressed = decompressor.decompress(block2_compressed)
     print(f"\nDecompressed size:  {len(block2_decompressed)} bytes")
     print(f"Expected size:      {block2_header.uncompressed_size} bytes")
     print(f"Size match:         {'PASS' if len(block2_decompressed) == block2_header.uncompressed_size else 'FAIL'}")
@@ -523,20 +541,7 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
 
     # Parse Block 3's nested headers to find Region 4 which declares Block 4's size
     # Block 3 has 4 nested headers with pattern: 01 XX XX XX 00 00 80 00
-    block3_regions = []
-    search_pos = block3_offset
-    for region_num in range(4):
-        # Find next header with pattern: version=0x01, size (3 bytes), 00 00 80 00
-        while search_pos < total_size - 8:
-            if (data[search_pos] == 0x01 and
-                data[search_pos+4:search_pos+8] == b'\x00\x00\x80\x00'):
-                region_size = struct.unpack('<I', data[search_pos+1:search_pos+4] + b'\x00')[0]
-                if 0 < region_size < 50000:  # Sanity check
-                    block3_regions.append((search_pos, region_size))
-                    # Move past this header + data + 5-byte gap
-                    search_pos = search_pos + 8 + region_size + 5
-                    break
-            search_pos += 1
+    block3_regions = find_block3_regions(data, block3_offset, total_size)
 
     # Region 4's declared size equals Block 4's compressed size (cross-block reference)
     if len(block3_regions) >= 4:
@@ -551,7 +556,7 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
         block3_size = 7972
         block4_compressed_size = None
 
-    block3_data = data[block3_offset:block3_offset + block3_size]
+    block3_data = view[block3_offset:block3_offset + block3_size]
 
     print(f"Offset: 0x{block3_offset:04X}")
     print(f"Size:   {len(block3_data):,} bytes")
@@ -594,20 +599,16 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
         block4_size = block4_compressed_size
     else:
         # Fallback: search for Block 5 header to determine Block 4 end
-        block5_offset = None
-        for i in range(block4_offset + 100, total_size - 8):
-            if (data[i] == 0x01 and
-                data[i+4:i+8] == b'\x00\x00\x80\x00'):
-                region_size = struct.unpack('<I', data[i+1:i+4] + b'\x00')[0]
-                if 0 < region_size < 10000:
-                    block5_offset = i
-                    break
-        if block5_offset is None:
+        block5_header = find_block3_regions(data, block4_offset + 100, total_size,
+                                            count=1, max_size=10000)
+        if block5_header:
+            block5_offset = block5_header[0].offset
+        else:
             # Last resort fallback
             block5_offset = total_size - 6266
         block4_size = block5_offset - block4_offset
 
-    block4_compressed = data[block4_offset:block4_offset + block4_size]
+    block4_compressed = view[block4_offset:block4_offset + block4_size]
 
     # Calculate Block 5 offset (immediately after Block 4)
     block5_offset = block4_offset + block4_size
@@ -653,7 +654,7 @@ def parse_savegame(filepath: str, output_dir: str = None, scan_types: bool = Fal
     print("-" * 80)
 
     # block5_offset and block5_size already calculated after Block 4
-    block5_data = data[block5_offset:block5_offset + block5_size]
+    block5_data = view[block5_offset:block5_offset + block5_size]
 
     print(f"Offset: 0x{block5_offset:04X}")
     print(f"Size:   {len(block5_data):,} bytes")
@@ -24,6 +24,9 @@ import argparse
 
 # Import LZSS compressor
 from lzss import compress_with_debug as compress_lzss_lazy
+from checksum import adler32_zero_seed as adler32
+from header_codec import pack_header
+from block3_regions import REGION_COUNT, find_block3_regions
 
 # =============================================================================
 # Scimitar Engine Type System - Hash Definitions
@@ -250,30 +253,19 @@ MAGIC3 = 0x00020001
 MAGIC4 = 0x01000080
 
 
-def adler32(data: bytes) -> int:
-    """
-    Adler-32 checksum with ZERO SEED (game variant).
-    Standard Adler-32 uses s1=1, s2=0; game uses s1=0, s2=0.
-    """
-    MOD_ADLER = 65521
-    s1 = 0
-    s2 = 0
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
-    return (s2 << 16) | s1
-
-
-def build_block1_header(compressed_data: bytes, uncompressed_size: int) -> bytes:
+def build_block1_header(compressed_data: bytes, uncompressed_size: int,
+                        checksum: int = None) -> bytes:
     """
     Build 44-byte header for Block 1.
 
     Field3 = compressed_size + 32 (verified from documentation)
+    The checksum is computed from compressed_data if not given.
     """
     compressed_size = len(compressed_data)
-    checksum = adler32(compressed_data)
+    if checksum is None:
+        checksum = adler32(compressed_data)
 
-    header = struct.pack('<11I',
+    header = pack_header((
         0x00000016,              # Field1: Static value
         0x00FEDBAC,              # Field2: Magic marker
         compressed_size + 32,    # Field3: compressed_size + 32
@@ -285,7 +277,7 @@ def build_block1_header(compressed_data: bytes, uncompressed_size: int) -> bytes
         compressed_size,         # Compressed size
         uncompressed_size,       # Uncompressed size (duplicate)
         checksum                 # Checksum
-    )
+    ))
     return header
 
 
@@ -326,7 +318,8 @@ def calculate_block2_field4(block2_decompressed: bytes) -> int:
 
 
 def build_block2_header(compressed_data: bytes, uncompressed_size: int, remaining_file_size: int,
-                        field4: int = None, block2_decompressed: bytes = None) -> bytes:
+                        field4: int = None, block2_decompressed: bytes = None,
+                        checksum: int = None) -> bytes:
     """
     Build 44-byte header for Block 2.
 
@@ -343,9 +336,11 @@ def build_block2_header(compressed_data: bytes, uncompressed_size: int, remainin
     Args:
         field4: If provided, use this value directly.
         block2_decompressed: If provided and field4 is None, calculate Field4 from this.
+        checksum: Adler-32 of compressed_data if already known.
     """
     compressed_size = len(compressed_data)
-    checksum = adler32(compressed_data)
+    if checksum is None:
+        checksum = adler32(compressed_data)
 
     # Calculate field4 from decompressed content if not provided
     if field4 is None:
@@ -355,7 +350,7 @@ def build_block2_header(compressed_data: bytes, uncompressed_size: int, remainin
             # Legacy fallback - should not be reached in normal operation
             raise ValueError("Cannot calculate Field4: need either field4 value or block2_decompressed data")
 
-    header = struct.pack('<11I',
+    header = pack_header((
         remaining_file_size - 4,  # Field1: remaining_file_size - 4
         0x00000001,               # Field2: Section number
         0x00CAFE00,               # Field3: Magic marker
@@ -367,7 +362,7 @@ def build_block2_header(compressed_data: bytes, uncompressed_size: int, remainin
         compressed_size,          # Compressed size
         uncompressed_size,        # Uncompressed size
         checksum                  # Checksum
-    )
+    ))
     return header
 
 
@@ -386,29 +381,14 @@ def find_region4_in_block3(block3_data: bytes) -> int:
     Returns:
         Offset of Region 4 within block3_data, or -1 if not found
     """
-    pos = 0
-    region_count = 0
-
-    while pos < len(block3_data) - 8 and region_count < 4:
-        # Look for region header pattern: [01] [size 3B] [00 00 80 00]
-        if (block3_data[pos] == 0x01 and
-            block3_data[pos+4:pos+8] == b'\x00\x00\x80\x00'):
-
-            region_count += 1
-            if region_count == 4:
-                return pos
-
-            # Parse size to skip to next region
-            region_size = struct.unpack('<I', block3_data[pos+1:pos+4] + b'\x00')[0]
-            # Move past: 8-byte header + region_size bytes + 5-byte gap
-            pos = pos + 8 + region_size + 5
-        else:
-            pos += 1
-
-    return -1
+    regions = find_block3_regions(block3_data)
+    if len(regions) < REGION_COUNT:
+        return -1
+    return regions[REGION_COUNT - 1].offset
 
 
-def update_block3_region4(block3_data: bytes, new_block4_size: int, block4_compressed: bytes) -> bytes:
+def update_block3_region4(block3_data: bytes, new_block4_size: int, block4_compressed: bytes,
+                          checksum: int = None) -> bytes:
     """
     Update Block 3's Region 4 header with new Block 4 size and checksum.
 
@@ -424,6 +404,7 @@ def update_block3_region4(block3_data: bytes, new_block4_size: int, block4_compr
         block3_data: Original Block 3 raw data
         new_block4_size: New Block 4 compressed size
         block4_compressed: New Block 4 compressed data (for checksum)
+        checksum: Adler-32 of block4_compressed if already known
 
     Returns:
         Updated Block 3 data with corrected Region 4
@@ -443,7 +424,7 @@ def update_block3_region4(block3_data: bytes, new_block4_size: int, block4_compr
     block3[r4_offset+1:r4_offset+4] = size_bytes
 
     # Update checksum (32-bit LE at offset +9)
-    new_checksum = adler32(block4_compressed)
+    new_checksum = checksum if checksum is not None else adler32(block4_compressed)
     block3[r4_offset+9:r4_offset+13] = struct.pack('<I', new_checksum)
 
     print(f"  Updated Region 4 at offset 0x{r4_offset:04X}:")
@@ -508,13 +489,19 @@ class SavSerializer:
         block4_compressed, _, s1_count4 = compress_lzss_lazy(self.block4_decompressed)
         print(f"    {len(self.block4_decompressed)} -> {len(block4_compressed)} bytes (S1: {s1_count4})")
 
+        # One checksum pass per compressed block, shared by headers and Region 4
+        block1_checksum = adler32(block1_compressed)
+        block2_checksum = adler32(block2_compressed)
+        block4_checksum = adler32(block4_compressed)
+
         # CRITICAL: Update Block 3's Region 4 with new Block 4 compressed size
         # Region 4 declares Block 4's size and checksum - must match actual compressed data
         print("\nUpdating Block 3 Region 4...")
         block3_updated = update_block3_region4(
             self.block3_raw,
             len(block4_compressed),
-            block4_compressed
+            block4_compressed,
+            block4_checksum
         )
 
         # Recalculate remaining file size (Block 3 size unchanged, but verify)
@@ -528,13 +515,15 @@ class SavSerializer:
         print("\nBuilding headers...")
 
         # Build headers
-        block1_header = build_block1_header(block1_compressed, len(self.block1_decompressed))
+        block1_header = build_block1_header(block1_compressed, len(self.block1_decompressed),
+                                           block1_checksum)
         block2_header = build_block2_header(block2_compressed, len(self.block2_decompressed),
                                            remaining_after_block2_header, field4=self.block2_field4,
-                                           block2_decompressed=self.block2_decompressed)
+                                           block2_decompressed=self.block2_decompressed,
+                                           checksum=block2_checksum)
 
-        print(f"  Block 1 header: 44 bytes, checksum=0x{adler32(block1_compressed):08X}")
-        print(f"  Block 2 header: 44 bytes, checksum=0x{adler32(block2_compressed):08X}")
+        print(f"  Block 1 header: 44 bytes, checksum=0x{block1_checksum:08X}")
+        print(f"  Block 2 header: 44 bytes, checksum=0x{block2_checksum:08X}")
 
         # Assemble file
         print("\nAssembling file...")
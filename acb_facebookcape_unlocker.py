@@ -27,6 +27,7 @@ Usage:
 
 import sys
 import os
+import re
 import struct
 
 try:
@@ -36,7 +37,7 @@ except ImportError:
     HAS_CURSES = False
 
 # Import LZSS compression/decompression
-from lzss import compress, decompress
+from lzss import decompress, plan_compression
 
 # =============================================================================
 # CONSTANTS
@@ -64,32 +65,15 @@ PS3_FILE_SIZE = 307200  # 0x4B000
 # CHECKSUMS
 # =============================================================================
 
-def adler32_zero_seed(data: bytes) -> int:
-    """Adler-32 with zero seed (AC Brotherhood variant)."""
-    MOD_ADLER = 65521
-    s1 = 0
-    s2 = 0
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
-    return (s2 << 16) | s1
-
-
-def crc32_ps3(data: bytes) -> int:
-    """CRC32 with PS3 parameters."""
-    crc = 0xBAE23CD0
-    for byte in data:
-        byte = int('{:08b}'.format(byte)[::-1], 2)
-        crc ^= (byte << 24)
-        for _ in range(8):
-            if crc & 0x80000000:
-                crc = ((crc << 1) ^ 0x04C11DB7) & 0xFFFFFFFF
-            else:
-                crc = (crc << 1) & 0xFFFFFFFF
-    crc = int('{:032b}'.format(crc)[::-1], 2)
-    return (crc ^ 0xFFFFFFFF) & 0xFFFFFFFF
+from checksum import adler32_zero_seed, crc32_ps3
 
 
+# =============================================================================
+# HEADERS
+# =============================================================================
+
+from header_codec import HEADER_SIZE, Header, MAGIC_FIELDS, pack_header, unpack_header
+from block3_regions import find_block3_regions
 
 
 # =============================================================================
@@ -104,7 +88,7 @@ def detect_format(data: bytes) -> str:
             prefix_size = struct.unpack('>I', data[0:4])[0]
             prefix_crc = struct.unpack('>I', data[4:8])[0]
             if prefix_size < len(data) - 8:
-                actual_crc = crc32_ps3(data[8:8 + prefix_size])
+                actual_crc = crc32_ps3(memoryview(data)[8:8 + prefix_size])
                 if actual_crc == prefix_crc:
                     return 'PS3'
 
@@ -121,33 +105,12 @@ def detect_format(data: bytes) -> str:
 # SHARED PARSING HELPERS
 # =============================================================================
 
-def _find_block3_regions(data: bytes, start_offset: int, total_size: int) -> list:
-    """
-    Find all 4 region headers in Block 3.
-
-    Returns list of (offset, size) tuples for each region.
-    """
-    regions = []
-    search_pos = start_offset
-    for region_num in range(4):
-        while search_pos < total_size - 8:
-            if (data[search_pos] == 0x01 and
-                data[search_pos+4:search_pos+8] == b'\x00\x00\x80\x00'):
-                region_size = struct.unpack('<I', data[search_pos+1:search_pos+4] + b'\x00')[0]
-                if 0 < region_size < 50000:
-                    regions.append((search_pos, region_size))
-                    search_pos = search_pos + 8 + region_size + 5
-                    break
-            search_pos += 1
-    return regions
-
-
 def _patch_block4_in_block3(block3_raw: bytearray, region4_offset: int,
-                            block4_recompressed: bytes) -> None:
+                            block4_recompressed: bytes, checksum: int = None) -> None:
     """
     Patch Block 3's Region 4 header with new Block 4 size and checksum.
 
-    Modifies block3_raw in place.
+    Modifies block3_raw in place. The checksum is computed if not given.
     """
     # Update size
     old_b4_size = struct.unpack('<I', bytes(block3_raw[region4_offset+1:region4_offset+4]) + b'\x00')[0]
@@ -158,7 +121,7 @@ def _patch_block4_in_block3(block3_raw: bytearray, region4_offset: int,
 
     # Update checksum
     old_checksum = struct.unpack('<I', bytes(block3_raw[region4_offset+9:region4_offset+13]))[0]
-    new_checksum = adler32_zero_seed(block4_recompressed)
+    new_checksum = checksum if checksum is not None else adler32_zero_seed(block4_recompressed)
     if old_checksum != new_checksum:
         block3_raw[region4_offset+9:region4_offset+13] = struct.pack('<I', new_checksum)
 
@@ -168,24 +131,29 @@ def _patch_block4_in_block3(block3_raw: bytearray, region4_offset: int,
 # =============================================================================
 
 def parse_pc_sav_blocks(data: bytes) -> dict:
-    """Parse PC SAV file and extract all 5 blocks."""
+    """
+    Parse PC SAV file and extract all 5 blocks.
+
+    Blocks are memoryviews into data, not copies.
+    """
     total_size = len(data)
+    view = memoryview(data)
 
     # Block 1: 44-byte header at offset 0, then compressed data
-    block1_compressed_size = struct.unpack('<I', data[0x20:0x24])[0]
-    block1_compressed = data[0x2C:0x2C + block1_compressed_size]
+    block1_compressed_size = unpack_header(data, 0).compressed_size
+    block1_compressed = view[HEADER_SIZE:HEADER_SIZE + block1_compressed_size]
 
     # Block 2: 44-byte header immediately after Block 1
-    block2_header_offset = 0x2C + block1_compressed_size
-    block2_compressed_size = struct.unpack('<I', data[block2_header_offset + 0x20:block2_header_offset + 0x24])[0]
-    block2_data_offset = block2_header_offset + 44
-    block2_compressed = data[block2_data_offset:block2_data_offset + block2_compressed_size]
+    block2_header_offset = HEADER_SIZE + block1_compressed_size
+    block2_compressed_size = unpack_header(data, block2_header_offset).compressed_size
+    block2_data_offset = block2_header_offset + HEADER_SIZE
+    block2_compressed = view[block2_data_offset:block2_data_offset + block2_compressed_size]
 
     # Block 3: Raw data with 4 regions
     block3_offset = block2_data_offset + block2_compressed_size
 
     # Find all 4 region headers in Block 3
-    block3_regions = _find_block3_regions(data, block3_offset, total_size)
+    block3_regions = find_block3_regions(data, block3_offset, total_size)
 
     # Region 4's declared size equals Block 4's compressed size
     if len(block3_regions) >= 4:
@@ -196,24 +164,24 @@ def parse_pc_sav_blocks(data: bytes) -> dict:
     else:
         raise ValueError(f"Could not parse Block 3 headers, found {len(block3_regions)} regions")
 
-    block3_raw = data[block3_offset:block3_offset + block3_size]
+    block3_raw = view[block3_offset:block3_offset + block3_size]
 
     # Calculate Region 4's offset within Block 3 (for later patching)
     region4_offset_in_block3 = region4_offset - block3_offset
 
     # Block 4: LZSS compressed, size from Region 4's declared value
     block4_offset = block3_offset + block3_size
-    block4_compressed = data[block4_offset:block4_offset + block4_compressed_size]
+    block4_compressed = view[block4_offset:block4_offset + block4_compressed_size]
 
     # Block 5: Rest of file
     block5_offset = block4_offset + block4_compressed_size
-    block5_raw = data[block5_offset:]
+    block5_raw = view[block5_offset:]
 
     return {
-        'block1_header': data[0:0x2C],
+        'block1_header': view[0:HEADER_SIZE],
         'block1_compressed': block1_compressed,
         'block2_header_offset': block2_header_offset,
-        'block2_header': data[block2_header_offset:block2_header_offset + 44],
+        'block2_header': view[block2_header_offset:block2_header_offset + HEADER_SIZE],
         'block2_compressed': block2_compressed,
         'block3_raw': block3_raw,
         'block4_compressed': block4_compressed,
@@ -227,37 +195,36 @@ def parse_pc_sav_blocks(data: bytes) -> dict:
 # =============================================================================
 
 def parse_ps3_sav_blocks(data: bytes) -> dict:
-    """Parse PS3 SAV file and extract all 5 blocks."""
+    """
+    Parse PS3 SAV file and extract all 5 blocks.
+
+    Blocks are memoryviews into data, not copies.
+    """
     # Verify PS3 prefix
     if len(data) < 8:
         raise ValueError("File too small for PS3 SAV format")
 
-    ps3_size = struct.unpack('>I', data[0:4])[0]
-    ps3_checksum = struct.unpack('>I', data[4:8])[0]
+    ps3_size, ps3_checksum = struct.unpack_from('>II', data, 0)
 
     # SAV data starts after 8-byte prefix
-    sav_data = data[8:]
+    sav_data = memoryview(data)[8:]
     total_size = len(sav_data)
 
-    # Block 1: 44-byte header, sizes at offset 0x20 (LE)
-    b1_comp_size = struct.unpack('<I', sav_data[0x20:0x24])[0]
-    b1_uncomp_size = struct.unpack('<I', sav_data[0x24:0x28])[0]
-    b1_checksum = struct.unpack('<I', sav_data[0x28:0x2C])[0]
-    b1_compressed = sav_data[44:44 + b1_comp_size]
+    # Block 1: 44-byte header; the sizes are little-endian on PS3 too
+    b1_comp_size = unpack_header(sav_data, 0, 'PS3').compressed_size
+    b1_compressed = sav_data[HEADER_SIZE:HEADER_SIZE + b1_comp_size]
 
     # Block 2: 44-byte header immediately after Block 1
-    b2_header_offset = 44 + b1_comp_size
-    b2_comp_size = struct.unpack('<I', sav_data[b2_header_offset + 0x20:b2_header_offset + 0x24])[0]
-    b2_uncomp_size = struct.unpack('<I', sav_data[b2_header_offset + 0x24:b2_header_offset + 0x28])[0]
-    b2_checksum = struct.unpack('<I', sav_data[b2_header_offset + 0x28:b2_header_offset + 0x2C])[0]
-    b2_data_offset = b2_header_offset + 44
+    b2_header_offset = HEADER_SIZE + b1_comp_size
+    b2_comp_size = unpack_header(sav_data, b2_header_offset, 'PS3').compressed_size
+    b2_data_offset = b2_header_offset + HEADER_SIZE
     b2_compressed = sav_data[b2_data_offset:b2_data_offset + b2_comp_size]
 
     # Block 3: Raw data with 4 regions
     b3_offset = b2_data_offset + b2_comp_size
 
     # Find all 4 region headers in Block 3
-    block3_regions = _find_block3_regions(sav_data, b3_offset, total_size)
+    block3_regions = find_block3_regions(sav_data, b3_offset, total_size)
 
     if len(block3_regions) < 4:
         raise ValueError(f"Could not parse Block 3 headers, found {len(block3_regions)} regions")
@@ -282,10 +249,10 @@ def parse_ps3_sav_blocks(data: bytes) -> dict:
     return {
         'ps3_size': ps3_size,
         'ps3_checksum': ps3_checksum,
-        'block1_header': sav_data[0:44],
+        'block1_header': sav_data[0:HEADER_SIZE],
         'block1_compressed': b1_compressed,
         'block2_header_offset': b2_header_offset,
-        'block2_header': sav_data[b2_header_offset:b2_header_offset + 44],
+        'block2_header': sav_data[b2_header_offset:b2_header_offset + HEADER_SIZE],
         'block2_compressed': b2_compressed,
         'block3_raw': b3_raw,
         'block4_compressed': b4_compressed,
@@ -388,6 +355,45 @@ def change_name_in_block1(data: bytearray, new_name: str) -> bytearray:
 # CAPE ACCESS (exact copy from cape_unlocker.py)
 # =============================================================================
 
+def index_capes_in_block4(data: bytes, definitions=CAPE_DEFINITIONS) -> dict:
+    """
+    Locate every cape in Block 4 in a single pass.
+
+    All cape hashes are matched together (one regex alternation, with a
+    lookahead so overlapping hits are seen), applying the same cape_id check
+    as find_cape_in_block4. Flag writes do not move records, so the index
+    stays valid while Block 4 is edited.
+
+    Args:
+        data: Decompressed Block 4
+        definitions: (hash, expected_id, ...) entries, CAPE_DEFINITIONS by default
+
+    Returns:
+        {(cape_hash, expected_id): ownership flag offset} for each cape found
+    """
+    wanted = {}
+    for cape_hash, expected_id, *_ in definitions:
+        wanted.setdefault(cape_hash, []).append(expected_id)
+    if not wanted:
+        return {}
+
+    alternatives = b'|'.join(re.escape(struct.pack('<I', h)) for h in wanted)
+    pattern = re.compile(b'(?=(' + alternatives + b'))', re.DOTALL)
+
+    index = {}
+    for match in pattern.finditer(data):
+        pos = match.start()
+        id_offset = pos + CAPE_ID_OFFSET
+        if id_offset >= len(data):
+            continue
+        cape_hash = struct.unpack('<I', match.group(1))[0]
+        for expected_id in wanted[cape_hash]:
+            key = (cape_hash, expected_id)
+            if key not in index and data[id_offset] == expected_id:
+                index[key] = pos + OWNERSHIP_FLAG_OFFSET
+    return index
+
+
 def find_cape_in_block4(data: bytes, cape_hash: int, expected_id: int) -> int:
     """
     Find a cape in Block 4 by searching for its hash.
@@ -397,38 +403,29 @@ def find_cape_in_block4(data: bytes, cape_hash: int, expected_id: int) -> int:
     Returns the offset of the ownership flag, or -1 if not found.
     Verifies the cape_id at hash_offset + 14 matches expected_id.
     """
-    hash_bytes = struct.pack('<I', cape_hash)
-    pos = 0
-
-    while True:
-        pos = data.find(hash_bytes, pos)
-        if pos == -1:
-            return -1
+    key = (cape_hash, expected_id)
+    return index_capes_in_block4(data, [key]).get(key, -1)
 
-        # Check if cape_id matches at expected offset
-        id_offset = pos + CAPE_ID_OFFSET
-        if id_offset < len(data):
-            actual_id = data[id_offset]
-            if actual_id == expected_id:
-                # Found it! Return ownership flag offset
-                return pos + OWNERSHIP_FLAG_OFFSET
-
-        pos += 1
 
-    return -1
+def _cape_offset(data: bytes, cape_hash: int, expected_id: int, index: dict = None) -> int:
+    """Flag offset from a prebuilt index, or a fresh scan without one."""
+    if index is not None:
+        return index.get((cape_hash, expected_id), -1)
+    return find_cape_in_block4(data, cape_hash, expected_id)
 
 
-def get_cape_state(data: bytes, cape_hash: int, expected_id: int) -> bool:
+def get_cape_state(data: bytes, cape_hash: int, expected_id: int, index: dict = None) -> bool:
     """Get cape unlock state (True = unlocked)."""
-    offset = find_cape_in_block4(data, cape_hash, expected_id)
+    offset = _cape_offset(data, cape_hash, expected_id, index)
     if offset == -1 or offset >= len(data):
         return False
     return data[offset] != 0
 
 
-def set_cape_state(data: bytearray, cape_hash: int, expected_id: int, unlocked: bool):
+def set_cape_state(data: bytearray, cape_hash: int, expected_id: int, unlocked: bool,
+                   index: dict = None):
     """Set cape unlock state."""
-    offset = find_cape_in_block4(data, cape_hash, expected_id)
+    offset = _cape_offset(data, cape_hash, expected_id, index)
     if offset != -1 and offset < len(data):
         data[offset] = 0x01 if unlocked else 0x00
 
@@ -437,49 +434,48 @@ def set_cape_state(data: bytearray, cape_hash: int, expected_id: int, unlocked:
 # FILE SERIALIZATION
 # =============================================================================
 
-def _build_block1_header(compressed_data: bytes, uncompressed_size: int, is_ps3: bool) -> bytes:
-    """Build 44-byte Block 1 header with correct endianness."""
-    checksum = adler32_zero_seed(compressed_data)
+def _build_block1_header(compressed_data: bytes, uncompressed_size: int, is_ps3: bool,
+                         checksum: int = None) -> bytes:
+    """Build 44-byte Block 1 header with correct endianness (checksum computed if not given)."""
+    if checksum is None:
+        checksum = adler32_zero_seed(compressed_data)
     comp_size = len(compressed_data)
 
-    if is_ps3:
-        # PS3: first 3 fields big-endian, rest little-endian
-        header = bytearray()
-        header.extend(struct.pack('>I', 0x00000016))
-        header.extend(struct.pack('>I', 0x00FEDBAC))
-        header.extend(struct.pack('>I', comp_size + 32))
-        header.extend(struct.pack('<I', uncompressed_size))
-        header.extend(struct.pack('<I', 0x57FBAA33))
-        header.extend(struct.pack('<I', 0x1004FA99))
-        header.extend(struct.pack('<I', 0x00020001))
-        header.extend(struct.pack('<I', 0x01000080))
-        header.extend(struct.pack('<I', comp_size))
-        header.extend(struct.pack('<I', uncompressed_size))
-        header.extend(struct.pack('<I', checksum))
-        return bytes(header)
-    else:
-        # PC: all little-endian
-        return struct.pack('<11I',
-            0x00000016, 0x00FEDBAC, comp_size + 32, uncompressed_size,
-            0x57FBAA33, 0x1004FA99, 0x00020001, 0x01000080,
-            comp_size, uncompressed_size, checksum)
+    # PS3: first 3 fields big-endian, rest little-endian (see header_codec)
+    return pack_header(Header(0x00000016, 0x00FEDBAC, comp_size + 32, uncompressed_size,
+                              *MAGIC_FIELDS, comp_size, uncompressed_size, checksum),
+                       'PS3' if is_ps3 else 'PC')
 
 
 def _recompress_blocks(blocks: dict, block1_data: bytearray, block4_data: bytearray,
-                       block1_modified: bool, block4_modified: bool, is_ps3: bool) -> tuple:
+                       block1_modified: bool, block4_modified: bool, is_ps3: bool,
+                       budget: int = None) -> tuple:
     """
     Recompress modified blocks and patch Block 3.
 
-    Returns (block1_header, block1_compressed, block4_compressed, block3_raw, total_size_diff)
+    budget caps the combined compressed size of the modified blocks; blocks
+    that do not fit game-exact are escalated (see lzss.plan_compression).
+
+    Returns (block1_header, block1_compressed, block4_compressed, block3_raw,
+             total_size_diff, plan) where plan maps 'Block 1'/'Block 4' to
+             their plan_compression entries
     """
     block3_raw = bytearray(blocks['block3_raw'])
     region4_offset = blocks['region4_offset_in_block3']
     total_size_diff = 0
 
+    modified = {}
+    if block1_modified:
+        modified['Block 1'] = bytes(block1_data)
+    if block4_modified:
+        modified['Block 4'] = bytes(block4_data)
+    plan = dict(zip(modified, plan_compression(list(modified.values()), budget)))
+
     # Handle Block 1
     if block1_modified:
-        block1_compressed = compress(bytes(block1_data))
-        block1_header = _build_block1_header(block1_compressed, len(block1_data), is_ps3)
+        block1_compressed = plan['Block 1']['compressed']
+        block1_header = _build_block1_header(block1_compressed, len(block1_data), is_ps3,
+                                             plan['Block 1']['checksum'])
         total_size_diff += len(block1_compressed) - len(blocks['block1_compressed'])
     else:
         block1_header = blocks['block1_header']
@@ -487,23 +483,25 @@ def _recompress_blocks(blocks: dict, block1_data: bytearray, block4_data: bytear
 
     # Handle Block 4
     if block4_modified:
-        block4_compressed = compress(bytes(block4_data))
-        _patch_block4_in_block3(block3_raw, region4_offset, block4_compressed)
+        block4_compressed = plan['Block 4']['compressed']
+        _patch_block4_in_block3(block3_raw, region4_offset, block4_compressed,
+                                plan['Block 4']['checksum'])
         total_size_diff += len(block4_compressed) - len(blocks['block4_compressed'])
     else:
         block4_compressed = blocks['block4_compressed']
 
-    return block1_header, block1_compressed, block4_compressed, block3_raw, total_size_diff
+    return block1_header, block1_compressed, block4_compressed, block3_raw, total_size_diff, plan
 
 
 def save_pc_sav(filepath: str, blocks: dict, block1_data: bytearray,
                 block4_data: bytearray, block1_modified: bool, block4_modified: bool):
     """Save modified PC SAV file."""
-    block1_header, block1_compressed, block4_compressed, block3_raw, total_size_diff = \
+    block1_header, block1_compressed, block4_compressed, block3_raw, total_size_diff, _ = \
         _recompress_blocks(blocks, block1_data, block4_data, block1_modified, block4_modified, is_ps3=False)
 
     # Get Block 2 header+data and patch Field1 if size changed
-    block2_header_and_data = bytearray(blocks['block2_header'] + blocks['block2_compressed'])
+    block2_header_and_data = bytearray(blocks['block2_header'])
+    block2_header_and_data.extend(blocks['block2_compressed'])
     if total_size_diff != 0:
         old_field1 = struct.unpack('<I', block2_header_and_data[0:4])[0]
         block2_header_and_data[0:4] = struct.pack('<I', old_field1 + total_size_diff)
@@ -524,8 +522,21 @@ def save_pc_sav(filepath: str, blocks: dict, block1_data: bytearray,
 def save_ps3_sav(filepath: str, blocks: dict, block1_data: bytearray,
                  block4_data: bytearray, block1_modified: bool, block4_modified: bool):
     """Save modified PS3 SAV file."""
-    block1_header, block1_compressed, block4_compressed, block3_raw, total_size_diff = \
-        _recompress_blocks(blocks, block1_data, block4_data, block1_modified, block4_modified, is_ps3=True)
+    # Budget for the recompressed blocks: the fixed file size minus the
+    # prefix and every byte that is kept as-is
+    fixed_size = (8 + 44 + len(blocks['block2_header']) + len(blocks['block2_compressed']) +
+                  len(blocks['block3_raw']) + len(blocks['block5_raw']))
+    if not block1_modified:
+        fixed_size += len(blocks['block1_compressed'])
+    if not block4_modified:
+        fixed_size += len(blocks['block4_compressed'])
+
+    block1_header, block1_compressed, block4_compressed, block3_raw, total_size_diff, plan = \
+        _recompress_blocks(blocks, block1_data, block4_data, block1_modified, block4_modified,
+                           is_ps3=True, budget=PS3_FILE_SIZE - fixed_size)
+    for name, entry in plan.items():
+        print(f"{name}: {len(entry['compressed'])} bytes, LZSS level {entry['level']} "
+              f"({entry['seconds']:.2f}s)")
 
     # Get Block 2 header and patch Field1 if size changed (BE for PS3)
     block2_header = bytearray(blocks['block2_header'])
@@ -546,11 +557,13 @@ def save_ps3_sav(filepath: str, blocks: dict, block1_data: bytearray,
     # Build final output with PS3 prefix and padding
     output = bytearray()
     output.extend(struct.pack('>I', len(sav_payload)))
-    output.extend(struct.pack('>I', crc32_ps3(bytes(sav_payload))))
+    output.extend(struct.pack('>I', crc32_ps3(sav_payload)))
     output.extend(sav_payload)
 
     if len(output) < PS3_FILE_SIZE:
         output.extend(b'\x00' * (PS3_FILE_SIZE - len(output)))
+    elif len(output) > PS3_FILE_SIZE:
+        print(f"WARNING: File exceeds PS3 fixed size ({PS3_FILE_SIZE} bytes)")
 
     with open(filepath, 'wb') as f:
         f.write(output)
@@ -584,24 +597,28 @@ def build_unlock_items() -> list:
     return items
 
 
-def load_unlock_states(items: list, block1_data: bytes, block4_data: bytes):
+def load_unlock_states(items: list, block1_data: bytes, block4_data: bytes,
+                       cape_index: dict = None):
     """Load current states from decompressed block data."""
     for item in items:
         if item.is_name:
             _, _, name = find_name_in_block1(block1_data)
             item.name_value = name if name else "Unknown"
         else:
-            item.checked = get_cape_state(block4_data, item.hash_value, item.expected_id)
+            item.checked = get_cape_state(block4_data, item.hash_value, item.expected_id,
+                                          cape_index)
 
 
-def apply_unlock_states(items: list, block1_data: bytearray, block4_data: bytearray) -> None:
+def apply_unlock_states(items: list, block1_data: bytearray, block4_data: bytearray,
+                        cape_index: dict = None) -> None:
     """Apply unlock states to block data."""
     for item in items:
         if item.is_name:
             continue  # Name handled separately
-        old_state = get_cape_state(block4_data, item.hash_value, item.expected_id)
+        old_state = get_cape_state(block4_data, item.hash_value, item.expected_id, cape_index)
         if old_state != item.checked:
-            set_cape_state(block4_data, item.hash_value, item.expected_id, item.checked)
+            set_cape_state(block4_data, item.hash_value, item.expected_id, item.checked,
+                           cape_index)
 
 
 # =============================================================================
@@ -609,7 +626,7 @@ def apply_unlock_states(items: list, block1_data: bytearray, block4_data: bytear
 # =============================================================================
 
 def run_ui(stdscr, filepath: str, platform: str, blocks: dict,
-           block1_data: bytearray, block4_data: bytearray) -> tuple:
+           block1_data: bytearray, block4_data: bytearray, cape_index: dict = None) -> tuple:
     """Run the curses UI. Returns (should_save, new_name or None)."""
     curses.curs_set(0)
     curses.use_default_colors()
@@ -620,7 +637,7 @@ def run_ui(stdscr, filepath: str, platform: str, blocks: dict,
         curses.init_pair(3, curses.COLOR_YELLOW, -1)
 
     items = build_unlock_items()
-    load_unlock_states(items, block1_data, block4_data)
+    load_unlock_states(items, block1_data, block4_data, cape_index)
 
     selected = 0
     modified = False
@@ -698,7 +715,7 @@ def run_ui(stdscr, filepath: str, platform: str, blocks: dict,
 
         elif key in (ord('s'), ord('S')):
             # Apply changes to block data
-            apply_unlock_states(items, block1_data, block4_data)
+            apply_unlock_states(items, block1_data, block4_data, cape_index)
             return (True, new_name)
 
         elif key in (curses.KEY_UP, ord('k')):
@@ -759,10 +776,10 @@ def clear_screen():
 
 
 def run_text_ui(filepath: str, platform: str, blocks: dict,
-                block1_data: bytearray, block4_data: bytearray) -> tuple:
+                block1_data: bytearray, block4_data: bytearray, cape_index: dict = None) -> tuple:
     """Run simple text-based UI. Returns (should_save, new_name or None)."""
     items = build_unlock_items()
-    load_unlock_states(items, block1_data, block4_data)
+    load_unlock_states(items, block1_data, block4_data, cape_index)
     new_name = None
 
     while True:
@@ -806,7 +823,7 @@ def run_text_ui(filepath: str, platform: str, blocks: dict,
         if choice == 'Q':
             return (False, None)
         elif choice == 'S':
-            apply_unlock_states(items, block1_data, block4_data)
+            apply_unlock_states(items, block1_data, block4_data, cape_index)
             return (True, new_name)
         elif choice == 'A':
             for item in items:
@@ -855,6 +872,7 @@ def main():
 
     print(f"Loading {filepath}...")
 
+    # Read rather than mapped: the same file is rewritten on save
     with open(filepath, 'rb') as f:
         data = f.read()
 
@@ -883,18 +901,21 @@ def main():
     print(f"Block 1: {len(block1_data)} bytes")
     print(f"Block 4: {len(block4_data)} bytes")
 
+    # Cape records are located once and reused by every read and write below
+    cape_index = index_capes_in_block4(block4_data)
+
     # Run UI
     if HAS_CURSES:
         try:
             should_save, new_name = curses.wrapper(
                 lambda stdscr: run_ui(stdscr, filepath, platform, blocks,
-                                      block1_data, block4_data))
+                                      block1_data, block4_data, cape_index))
         except KeyboardInterrupt:
             print("\nCancelled.")
             return 0
     else:
         should_save, new_name = run_text_ui(filepath, platform, blocks,
-                                            block1_data, block4_data)
+                                            block1_data, block4_data, cape_index)
 
     if should_save:
         # Check what was modified
@@ -914,8 +935,8 @@ def main():
         # Check if any capes were modified
         orig_block4 = decompress(blocks['block4_compressed'])
         for hash_val, expected_id, name in CAPE_DEFINITIONS:
-            orig_state = get_cape_state(orig_block4, hash_val, expected_id)
-            new_state = get_cape_state(block4_data, hash_val, expected_id)
+            orig_state = get_cape_state(orig_block4, hash_val, expected_id, cape_index)
+            new_state = get_cape_state(block4_data, hash_val, expected_id, cape_index)
             if orig_state != new_state:
                 block4_modified = True
                 status = "UNLOCKED" if new_state else "LOCKED"
@@ -13,9 +13,11 @@ Usage:
 
 import sys
 import os
+import re
 import struct
 
 import lzss
+from header_codec import HEADER_SIZE, Header, MAGIC_FIELDS, pack_header, unpack_header
 
 try:
     import curses
@@ -57,35 +59,17 @@ SECTION3_BOOL_UNLOCKS = [
     (0x4DBC7DA7, "Gun Capacity Upgrade", "UPGRADES"),
 ]
 
+# Every property the UI reads or writes, indexed together in one pass
+UNLOCK_PROPERTY_HASHES = (
+    [h for h, _, _ in SECTION2_BOOL_UNLOCKS] + [COSTUME_HASH] +
+    [h for h, _, _ in SECTION3_BOOL_UNLOCKS]
+)
+
 # =============================================================================
-# CHECKSUMS (exact copy from options_unpack.py)
+# CHECKSUMS
 # =============================================================================
 
-def adler32_zero_seed(data: bytes) -> int:
-    """Adler-32 with zero seed (AC Brotherhood variant)."""
-    MOD_ADLER = 65521
-    s1 = 0
-    s2 = 0
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
-    return (s2 << 16) | s1
-
-
-def crc32_ps3(data: bytes) -> int:
-    """CRC32 with PS3 parameters."""
-    crc = 0xBAE23CD0
-    for byte in data:
-        byte = int('{:08b}'.format(byte)[::-1], 2)
-        crc ^= (byte << 24)
-        for _ in range(8):
-            if crc & 0x80000000:
-                crc = ((crc << 1) ^ 0x04C11DB7) & 0xFFFFFFFF
-            else:
-                crc = (crc << 1) & 0xFFFFFFFF
-    crc = int('{:032b}'.format(crc)[::-1], 2)
-    return (crc ^ 0xFFFFFFFF) & 0xFFFFFFFF
-
+from checksum import Crc32PS3, adler32_zero_seed, crc32_ps3
 
 
 # =============================================================================
@@ -99,7 +83,7 @@ def detect_format(data: bytes) -> str:
             prefix_size = struct.unpack('>I', data[0:4])[0]
             prefix_crc = struct.unpack('>I', data[4:8])[0]
             if prefix_size < len(data) - 8:
-                actual_crc = crc32_ps3(data[8:8 + prefix_size])
+                actual_crc = crc32_ps3(memoryview(data)[8:8 + prefix_size])
                 if actual_crc == prefix_crc:
                     return 'PS3'
 
@@ -113,11 +97,22 @@ def detect_format(data: bytes) -> str:
 
 
 # =============================================================================
-# SECTION PARSING (exact copy from options_unpack.py)
+# SECTION PARSING (same header scan as options_unpack.py)
 # =============================================================================
+#
+# Unlike options_unpack's lazy OptionsFile, sections are decompressed up front,
+# optionally only those in `decompress`. Each keeps its original header and
+# compressed bytes plus a snapshot of its data, so save_options_file can write
+# unchanged sections back verbatim.
+
+def find_sections(data: bytes, platform: str, decompress: set = None) -> list:
+    """
+    Find and parse all section headers.
 
-def find_sections(data: bytes, platform: str) -> list:
-    """Find and parse all section headers."""
+    decompress optionally limits which section numbers (1-based) are
+    decompressed; the others get no 'decompressed' entry and can only be
+    written back unchanged.
+    """
     headers = []
     prefix_offset = 8 if platform == 'PS3' else 0
     search_pos = prefix_offset
@@ -128,35 +123,40 @@ def find_sections(data: bytes, platform: str) -> list:
             break
 
         header_start = pattern_pos - 0x10
-        if header_start < prefix_offset or header_start + 44 > len(data):
+        if header_start < prefix_offset or header_start + HEADER_SIZE > len(data):
             search_pos = pattern_pos + len(MAGIC_PATTERN)
             continue
 
-        sizes_offset = pattern_pos + len(MAGIC_PATTERN)
-        if sizes_offset + 12 > len(data):
-            break
-
-        compressed_size = struct.unpack('<I', data[sizes_offset:sizes_offset+4])[0]
-        uncompressed_size = struct.unpack('<I', data[sizes_offset+4:sizes_offset+8])[0]
+        # Whole header in one pass; field2 (section ID) is preserved on save
+        fields = unpack_header(data, header_start, platform)
+        compressed_size = fields.compressed_size
+        uncompressed_size = fields.uncompressed_size
+        field2 = fields.field2
 
-        data_offset = header_start + 44
+        data_offset = header_start + HEADER_SIZE
         compressed_data = data[data_offset:data_offset + compressed_size]
-        decompressed = lzss.decompress(compressed_data)
-
-        # Parse field2 (section ID) to preserve it
-        if platform == 'PS3':
-            field2 = struct.unpack('>I', data[header_start+8:header_start+12])[0]
-        else:
-            field2 = struct.unpack('<I', data[header_start+8:header_start+12])[0]
 
-        headers.append({
+        section = {
             'header_offset': header_start,
             'data_offset': data_offset,
             'compressed_size': compressed_size,
             'uncompressed_size': uncompressed_size,
-            'decompressed': bytearray(decompressed),
             'field2': field2,
-        })
+            # Original header + compressed bytes, written back as-is while
+            # the decompressed data is unchanged (see save_options_file)
+            'header': data[header_start:data_offset],
+            'compressed': compressed_data,
+        }
+        if decompress is None or len(headers) + 1 in decompress:
+            try:
+                decompressed = lzss.decompress(compressed_data, uncompressed_size)
+            except ValueError:
+                # Header size too small; keep what the stream decodes to
+                decompressed = lzss.decompress(compressed_data)
+            # Immutable snapshot to detect edits against on save
+            section['original_decompressed'] = decompressed
+            section['decompressed'] = bytearray(decompressed)
+        headers.append(section)
 
         search_pos = pattern_pos + len(MAGIC_PATTERN)
 
@@ -189,17 +189,20 @@ def get_trailing_data(data: bytes, platform: str, sections: list) -> bytes:
 
 
 # =============================================================================
-# SECTION HEADER CONSTRUCTION (exact copy from options_pack.py)
+# SECTION HEADER CONSTRUCTION (adapted from options_pack.py)
 # =============================================================================
+#
+# Only used for sections save_options_file recompresses; unchanged sections
+# keep their original header. Unlike options_pack, an edited section keeps
+# its original field2.
 
 def build_section_header(section_num: int, compressed_data: bytes,
                          uncompressed_size: int, platform: str,
-                         orig_field2: int = None) -> bytes:
-    """Build a complete 44-byte section header."""
+                         orig_field2: int = None, checksum: int = None) -> bytes:
+    """Build a complete 44-byte section header (checksum computed if not given)."""
     compressed_size = len(compressed_data)
-    checksum = adler32_zero_seed(compressed_data)
-
-    MAGIC1, MAGIC2, MAGIC3, MAGIC4 = 0x57FBAA33, 0x1004FA99, 0x00020001, 0x01000080
+    if checksum is None:
+        checksum = adler32_zero_seed(compressed_data)
 
     if section_num == 1:
         field0 = 0x00000016
@@ -221,26 +224,8 @@ def build_section_header(section_num: int, compressed_data: bytes,
     else:
         raise ValueError(f"Invalid section number: {section_num}")
 
-    header = bytearray()
-    if platform == 'PS3':
-        header.extend(struct.pack('>I', field0))
-        header.extend(struct.pack('>I', field1))
-        header.extend(struct.pack('>I', field2))
-    else:
-        header.extend(struct.pack('<I', field0))
-        header.extend(struct.pack('<I', field1))
-        header.extend(struct.pack('<I', field2))
-
-    header.extend(struct.pack('<I', uncompressed_size))
-    header.extend(struct.pack('<I', MAGIC1))
-    header.extend(struct.pack('<I', MAGIC2))
-    header.extend(struct.pack('<I', MAGIC3))
-    header.extend(struct.pack('<I', MAGIC4))
-    header.extend(struct.pack('<I', compressed_size))
-    header.extend(struct.pack('<I', uncompressed_size))
-    header.extend(struct.pack('<I', checksum))
-
-    return bytes(header)
+    return pack_header(Header(field0, field1, field2, uncompressed_size, *MAGIC_FIELDS,
+                              compressed_size, uncompressed_size, checksum), platform)
 
 
 def build_gap_marker(section4_size: int, platform: str) -> bytes:
@@ -253,18 +238,32 @@ def build_gap_marker(section4_size: int, platform: str) -> bytes:
 
 
 # =============================================================================
-# FILE SERIALIZATION (exact copy from options_pack.py)
+# FILE SERIALIZATION (same file layout as options_pack.py)
 # =============================================================================
 
 def save_options_file(filepath: str, sections: list, platform: str, trailing_data: bytes = b''):
-    """Save sections back to OPTIONS file."""
+    """
+    Save sections back to OPTIONS file.
+
+    Only sections whose data differs from what find_sections loaded are
+    recompressed; the others (including sections it did not decompress) are
+    written back with their original header and compressed bytes.
+    """
     section_data = bytearray()
 
     for section_num, section in enumerate(sections, 1):
-        compressed = lzss.compress(bytes(section['decompressed']))
-        orig_field2 = section.get('field2')
-        header = build_section_header(section_num, compressed,
-                                      len(section['decompressed']), platform, orig_field2)
+        decompressed = section.get('decompressed')
+        if 'compressed' in section and (
+                decompressed is None or decompressed == section.get('original_decompressed')):
+            header = section['header']
+            compressed = section['compressed']
+        else:
+            compressed, checksum = lzss.compress(bytes(section['decompressed']),
+                                                 with_checksum=True)
+            orig_field2 = section.get('field2')
+            header = build_section_header(section_num, compressed,
+                                          len(section['decompressed']), platform, orig_field2,
+                                          checksum)
 
         if section_num == 4:
             gap_marker = build_gap_marker(len(header) + len(compressed), platform)
@@ -277,11 +276,12 @@ def save_options_file(filepath: str, sections: list, platform: str, trailing_dat
 
     if platform == 'PS3':
         # Include trailing data in prefix
-        prefix_data = section_data + trailing_data
-        data_size = len(prefix_data)
-        crc32_value = crc32_ps3(bytes(prefix_data))
-        output.extend(struct.pack('>II', data_size, crc32_value))
-        output.extend(prefix_data)
+        data_size = len(section_data) + len(trailing_data)
+        crc = Crc32PS3(section_data)
+        crc.update(trailing_data)
+        output.extend(struct.pack('>II', data_size, crc.digest()))
+        output.extend(section_data)
+        output.extend(trailing_data)
         padding = PS3_FILE_SIZE - len(output)
         if padding > 0:
             output.extend(bytes(padding))
@@ -303,52 +303,93 @@ def save_options_file(filepath: str, sections: list, platform: str, trailing_dat
 # PROPERTY ACCESS
 # =============================================================================
 
+def index_properties(section_data: bytes, hashes) -> dict:
+    """
+    Locate all given property hashes in a single pass over the section.
+
+    The hashes are combined into one regex alternation behind the 0x0E/0x11
+    type prefix; the lookahead lets matches overlap, so this finds the same
+    occurrence a per-hash find() loop would.
+
+    Returns {hash: value_offset} for the first typed occurrence of each hash;
+    hashes that are not found are absent.
+    """
+    hashes = list(hashes)
+    if not hashes:
+        return {}
+    alternatives = b'|'.join(re.escape(struct.pack('<I', h)) for h in hashes)
+    pattern = re.compile(b'(?=[\x0E\x11]\x00\x00\x00(' + alternatives + b'))', re.DOTALL)
+
+    offsets = {}
+    for match in pattern.finditer(section_data):
+        hash_value = struct.unpack('<I', match.group(1))[0]
+        if hash_value not in offsets:
+            offsets[hash_value] = match.start(1) + 13
+    return offsets
+
+
 def find_property_value_offset(section_data: bytes, hash_value: int) -> int:
     """Find property by hash and return offset to value byte(s)."""
-    hash_bytes = struct.pack('<I', hash_value)
-    pos = 0
+    return index_properties(section_data, (hash_value,)).get(hash_value, -1)
 
-    while True:
-        found = section_data.find(hash_bytes, pos)
-        if found == -1:
-            return -1
 
-        if found >= 4:
-            type_prefix = struct.unpack('<I', section_data[found-4:found])[0]
-            if type_prefix in (0x0E, 0x11):
-                return found + 13
+def _lookup(section_data: bytes, hash_value: int, index: dict = None) -> int:
+    """Value offset from a prebuilt index, or a fresh scan without one."""
+    if index is not None:
+        return index.get(hash_value, -1)
+    return find_property_value_offset(section_data, hash_value)
 
-        pos = found + 1
 
-
-def get_bool_unlock_state(section_data: bytes, hash_value: int) -> bool:
+def get_bool_unlock_state(section_data: bytes, hash_value: int, index: dict = None) -> bool:
     """Get bool unlock state (True = unlocked)."""
-    offset = find_property_value_offset(section_data, hash_value)
+    offset = _lookup(section_data, hash_value, index)
     if offset == -1 or offset >= len(section_data):
         return False
     return section_data[offset] != 0
 
 
-def set_bool_unlock_state(section_data: bytearray, hash_value: int, unlocked: bool):
-    """Set bool unlock state."""
-    offset = find_property_value_offset(section_data, hash_value)
+def set_bool_unlock_state(section_data: bytearray, hash_value: int, unlocked: bool,
+                          index: dict = None) -> bool:
+    """Set bool unlock state. Returns True if the data changed."""
+    offset = _lookup(section_data, hash_value, index)
     if offset != -1 and offset < len(section_data):
-        section_data[offset] = 0x01 if unlocked else 0x00
+        value = 0x01 if unlocked else 0x00
+        if section_data[offset] != value:
+            section_data[offset] = value
+            return True
+    return False
 
 
-def get_costume_bitmask(section_data: bytes) -> int:
+def get_costume_bitmask(section_data: bytes, index: dict = None) -> int:
     """Get costume bitmask value."""
-    offset = find_property_value_offset(section_data, COSTUME_HASH)
+    offset = _lookup(section_data, COSTUME_HASH, index)
     if offset == -1 or offset + 4 > len(section_data):
         return 0
     return struct.unpack('<I', section_data[offset:offset+4])[0]
 
 
-def set_costume_bitmask(section_data: bytearray, value: int):
-    """Set costume bitmask value."""
-    offset = find_property_value_offset(section_data, COSTUME_HASH)
+def set_costume_bitmask(section_data: bytearray, value: int, index: dict = None) -> bool:
+    """Set costume bitmask value. Returns True if the data changed."""
+    offset = _lookup(section_data, COSTUME_HASH, index)
     if offset != -1 and offset + 4 <= len(section_data):
-        section_data[offset:offset+4] = struct.pack('<I', value & 0x3F)
+        packed = struct.pack('<I', value & 0x3F)
+        if section_data[offset:offset+4] != packed:
+            section_data[offset:offset+4] = packed
+            return True
+    return False
+
+
+def section_property_index(section: dict) -> dict:
+    """
+    Return the section's hash -> value offset map, built on first use.
+
+    Edits only overwrite values in place, so the offsets stay valid for the
+    rest of the session.
+    """
+    if 'properties' not in section:
+        section['properties'] = index_properties(section['decompressed'],
+                                                 UNLOCK_PROPERTY_HASHES)
+    return section['properties']
 
 
 # =============================================================================
@@ -378,24 +419,34 @@ def build_unlock_items() -> list:
     return items
 
 
+def _unlock_sections(sections: list):
+    """Return (data, index) for Sections 2 and 3, or (None, None) if absent."""
+    found = []
+    for i in (1, 2):
+        if len(sections) > i and sections[i].get('decompressed'):
+            found.append((sections[i]['decompressed'], section_property_index(sections[i])))
+        else:
+            found.append((None, None))
+    return found
+
+
 def load_unlock_states(items: list, sections: list):
-    section2 = sections[1]['decompressed'] if len(sections) > 1 else None
-    section3 = sections[2]['decompressed'] if len(sections) > 2 else None
-    costume_mask = get_costume_bitmask(section2) if section2 else 0
+    (section2, index2), (section3, index3) = _unlock_sections(sections)
+    costume_mask = get_costume_bitmask(section2, index2) if section2 else 0
 
     for item in items:
         if item.section == 2 and section2:
             if item.is_costume:
                 item.checked = (costume_mask & item.bit) != 0
             else:
-                item.checked = get_bool_unlock_state(section2, item.hash_value)
+                item.checked = get_bool_unlock_state(section2, item.hash_value, index2)
         elif item.section == 3 and section3:
-            item.checked = get_bool_unlock_state(section3, item.hash_value)
+            item.checked = get_bool_unlock_state(section3, item.hash_value, index3)
 
 
 def save_unlock_states(items: list, sections: list):
-    section2 = sections[1]['decompressed'] if len(sections) > 1 else None
-    section3 = sections[2]['decompressed'] if len(sections) > 2 else None
+    """Write item states into the sections."""
+    (section2, index2), (section3, index3) = _unlock_sections(sections)
 
     costume_mask = 0
     for item in items:
@@ -405,11 +456,11 @@ def save_unlock_states(items: list, sections: list):
     for item in items:
         if item.section == 2 and section2:
             if item.is_costume:
-                set_costume_bitmask(section2, costume_mask)
+                set_costume_bitmask(section2, costume_mask, index2)
             else:
-                set_bool_unlock_state(section2, item.hash_value, item.checked)
+                set_bool_unlock_state(section2, item.hash_value, item.checked, index2)
         elif item.section == 3 and section3:
-            set_bool_unlock_state(section3, item.hash_value, item.checked)
+            set_bool_unlock_state(section3, item.hash_value, item.checked, index3)
 
 
 # =============================================================================
@@ -610,7 +661,8 @@ def _load_options_file(filepath: str):
 
     print(f"Detected format: {platform}")
 
-    sections = find_sections(data, platform)
+    # Only Sections 2 and 3 hold rewards; the rest are written back as-is
+    sections = find_sections(data, platform, decompress={2, 3})
     if len(sections) < 3:
         print(f"Error: Expected at least 3 sections, found {len(sections)}")
         return None
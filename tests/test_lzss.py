@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Compression level checks for lzss.py.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import lzss
+
+
+def run_heavy(seed: int) -> bytes:
+    """Long byte runs and repeated short patterns mixed with random bytes."""
+    rng = random.Random(seed)
+    size = rng.randint(2000, 12000)
+    out = bytearray()
+    while len(out) < size:
+        kind = rng.random()
+        if kind < 0.4:
+            out += bytes([rng.choice([0x00, 0xFF, 0x01])]) * rng.randint(1, 600)
+        elif kind < 0.7:
+            out += rng.randbytes(rng.randint(1, 40))
+        else:
+            out += rng.choice([b'ab', b'xyz', b'\x00\x01', b'hello']) * rng.randint(1, 200)
+    return bytes(out)
+
+
+def sparse(size: int, seed: int) -> bytes:
+    """Zero-filled buffer with short random islands, like a mostly empty save."""
+    rng = random.Random(seed)
+    out = bytearray(size)
+    for _ in range(size // 1000):
+        pos = rng.randrange(size - 20)
+        out[pos:pos + rng.randint(1, 20)] = rng.randbytes(20)
+    return bytes(out)
+
+
+class BestLevelTest(unittest.TestCase):
+
+    def assert_best_not_larger(self, data: bytes):
+        best = lzss.compress(data, level='best')
+        exact = lzss.compress(data, level='exact')
+        self.assertEqual(lzss.decompress(best), data)
+        if lzss.decompress(exact) != data:
+            # The game's parse can emit lengths 9 + 255k, which don't decode
+            self.skipTest('exact output does not round-trip')
+        self.assertLessEqual(len(best), len(exact))
+
+    def test_run_heavy(self):
+        for seed in range(40):
+            with self.subTest(seed=seed):
+                self.assert_best_not_larger(run_heavy(seed))
+
+    def test_sparse(self):
+        self.assert_best_not_larger(sparse(60000, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
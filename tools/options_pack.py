@@ -41,6 +41,9 @@ import os
 import struct
 import argparse
 
+# Shared modules (checksum.py, lzss.py) live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 # =============================================================================
 # CONSTANTS
@@ -65,61 +68,26 @@ SECTION_NAMES = {
 # CHECKSUMS
 # =============================================================================
 
-def adler32_zero_seed(data: bytes) -> int:
-    """
-    Calculate Adler-32 checksum with zero seed (AC Brotherhood variant).
-    Used for validating compressed data integrity.
-    """
-    MOD_ADLER = 65521
-    s1 = 0
-    s2 = 0
-
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
-
-    return (s2 << 16) | s1
-
-
-def crc32_ps3(data: bytes) -> int:
-    """
-    Calculate CRC32 using PS3's custom parameters.
-    Used for the PS3 file prefix.
-
-    Parameters: poly=0x04C11DB7, init=0xBAE23CD0, xorout=0xFFFFFFFF,
-                refin=true, refout=true
-    """
-    crc = 0xBAE23CD0
-
-    for byte in data:
-        # Reflect input byte
-        byte = int('{:08b}'.format(byte)[::-1], 2)
-        crc ^= (byte << 24)
-
-        for _ in range(8):
-            if crc & 0x80000000:
-                crc = ((crc << 1) ^ 0x04C11DB7) & 0xFFFFFFFF
-            else:
-                crc = (crc << 1) & 0xFFFFFFFF
-
-    # Reflect output
-    crc = int('{:032b}'.format(crc)[::-1], 2)
-    return (crc ^ 0xFFFFFFFF) & 0xFFFFFFFF
+from checksum import adler32_zero_seed, crc32_ps3
 
 
 # =============================================================================
 # LZSS COMPRESSION
 # =============================================================================
 
-from lzss import compress as compress_lzss
+from lzss import plan_compression, CompressionCache, COMPRESSION_LEVELS
 
 
 # =============================================================================
 # SECTION HEADER CONSTRUCTION
 # =============================================================================
 
+from header_codec import Header, MAGIC_FIELDS, pack_header
+
+
 def build_section_header(section_num: int, compressed_data: bytes,
-                         uncompressed_size: int, platform: str) -> bytes:
+                         uncompressed_size: int, platform: str,
+                         checksum: int = None) -> bytes:
     """
     Build a complete 44-byte section header.
 
@@ -128,18 +96,15 @@ def build_section_header(section_num: int, compressed_data: bytes,
         compressed_data: Compressed LZSS bytes
         uncompressed_size: Size of uncompressed data
         platform: 'PC' or 'PS3'
+        checksum: Adler-32 of compressed_data if already known
+            (e.g. from compress(..., with_checksum=True))
 
     Returns:
         Complete 44-byte header bytes
     """
     compressed_size = len(compressed_data)
-    checksum = adler32_zero_seed(compressed_data)
-
-    # Common magic values (always little-endian)
-    MAGIC1 = 0x57FBAA33
-    MAGIC2 = 0x1004FA99
-    MAGIC3 = 0x00020001
-    MAGIC4 = 0x01000080
+    if checksum is None:
+        checksum = adler32_zero_seed(compressed_data)
 
     # Section-specific field values
     if section_num == 1:
@@ -162,31 +127,9 @@ def build_section_header(section_num: int, compressed_data: bytes,
     else:
         raise ValueError(f"Invalid section number: {section_num}")
 
-    # Build header based on platform
-    header = bytearray()
-
-    if platform == 'PS3':
-        # PS3: Fields 0-2 big-endian, fields 3-10 little-endian
-        header.extend(struct.pack('>I', field0))
-        header.extend(struct.pack('>I', field1))
-        header.extend(struct.pack('>I', field2))
-    else:
-        # PC: All fields little-endian
-        header.extend(struct.pack('<I', field0))
-        header.extend(struct.pack('<I', field1))
-        header.extend(struct.pack('<I', field2))
-
-    # Fields 3-10 are always little-endian
-    header.extend(struct.pack('<I', uncompressed_size))  # Field3
-    header.extend(struct.pack('<I', MAGIC1))             # Magic1
-    header.extend(struct.pack('<I', MAGIC2))             # Magic2
-    header.extend(struct.pack('<I', MAGIC3))             # Magic3
-    header.extend(struct.pack('<I', MAGIC4))             # Magic4
-    header.extend(struct.pack('<I', compressed_size))    # Field5
-    header.extend(struct.pack('<I', uncompressed_size))  # Field6
-    header.extend(struct.pack('<I', checksum))           # Field7
-
-    return bytes(header)
+    # PS3 stores fields 0-2 big-endian (see header_codec)
+    return pack_header(Header(field0, field1, field2, uncompressed_size, *MAGIC_FIELDS,
+                              compressed_size, uncompressed_size, checksum), platform)
 
 
 def build_gap_marker(section4_size: int, platform: str) -> bytes:
@@ -214,64 +157,64 @@ def build_gap_marker(section4_size: int, platform: str) -> bytes:
 # MAIN SERIALIZATION
 # =============================================================================
 
-def serialize_options_file(section_files: list, output_file: str,
-                           platform: str) -> dict:
+def pack_sections(section_files: list, platform: str, level: str,
+                  results: dict, cache: CompressionCache = None) -> bytearray:
     """
-    Create a complete OPTIONS file from decompressed section files.
+    Compress section files and lay them out with headers (and gap marker).
+
+    On PS3 the sections are planned against the fixed file size: each one is
+    compressed at `level` first, and only the largest sections are escalated
+    to 'best' until the file fits (see lzss.plan_compression).
 
     Args:
         section_files: List of 3 or 4 paths to decompressed section files
-        output_file: Path to output OPTIONS file
         platform: 'PC' or 'PS3'
+        level: LZSS compression level (see lzss.compress)
+        results: Statistics dict; per-section info and totals are added
+        cache: Optional CompressionCache; unchanged sections skip compression
 
     Returns:
-        Dictionary with statistics and validation info
+        Section bytes, without the platform prefix/footer
     """
-    num_sections = len(section_files)
-    if num_sections not in [3, 4]:
-        raise ValueError(f"Expected 3 or 4 section files, got {num_sections}")
+    sections = []
+    for section_file in section_files:
+        if not os.path.exists(section_file):
+            raise FileNotFoundError(f"Section file not found: {section_file}")
+        with open(section_file, 'rb') as f:
+            sections.append(f.read())
 
-    results = {
-        'platform': platform,
-        'sections': [],
-        'total_compressed_size': 0,
-        'total_uncompressed_size': 0,
-        'has_section4': num_sections == 4,
-    }
+    # Everything except the compressed bytes: PS3 prefix, headers, gap marker
+    budget = None
+    if platform == 'PS3':
+        overhead = 8 + 44 * len(sections) + (8 if len(sections) == 4 else 0)
+        budget = PS3_FILE_SIZE - overhead
+    levels = (level,) if level == 'best' else (level, 'best')
+    plan = plan_compression(sections, budget, levels, cache)
 
-    # Build section data
     section_data = bytearray()
 
-    for section_num in range(1, num_sections + 1):
-        section_file = section_files[section_num - 1]
+    for section_num, (section_file, uncompressed_data, entry) in \
+            enumerate(zip(section_files, sections, plan), 1):
         section_name = SECTION_NAMES.get(section_num, f"Section {section_num}")
 
         print(f"\nProcessing Section {section_num} ({section_name}):")
         print(f"  Input file: {section_file}")
 
-        # Read uncompressed data
-        if not os.path.exists(section_file):
-            raise FileNotFoundError(f"Section file not found: {section_file}")
-
-        with open(section_file, 'rb') as f:
-            uncompressed_data = f.read()
-
         uncompressed_size = len(uncompressed_data)
         print(f"  Uncompressed size: {uncompressed_size} bytes")
 
-        # Compress the section
-        compressed_data = compress_lzss(uncompressed_data)
+        compressed_data = entry['compressed']
+        checksum = entry['checksum']
         compressed_size = len(compressed_data)
         ratio_pct = 100 * compressed_size / uncompressed_size if uncompressed_size > 0 else 0
         print(f"  Compressed size: {compressed_size} bytes ({ratio_pct:.1f}%)")
+        print(f"  LZSS level: {entry['level']} "
+              f"(tried {', '.join(entry['levels_tried'])}; {entry['seconds']:.2f}s)")
 
         # Build section header
         header = build_section_header(section_num, compressed_data,
-                                      uncompressed_size, platform)
+                                      uncompressed_size, platform, checksum)
         print(f"  Header size: {len(header)} bytes")
-
-        # Calculate checksum
-        checksum = adler32_zero_seed(compressed_data)
         print(f"  Adler-32: 0x{checksum:08X}")
 
         # For section 4, add gap marker before header
@@ -300,19 +243,61 @@ def serialize_options_file(section_files: list, output_file: str,
             'uncompressed_size': uncompressed_size,
             'checksum': checksum,
             'compression_ratio': uncompressed_size / compressed_size if compressed_size > 0 else 0,
+            'level': entry['level'],
+            'levels_tried': entry['levels_tried'],
+            'seconds': entry['seconds'],
         }
         results['sections'].append(section_info)
 
         results['total_compressed_size'] += compressed_size
         results['total_uncompressed_size'] += uncompressed_size
 
+    return section_data
+
+
+def serialize_options_file(section_files: list, output_file: str,
+                           platform: str, level: str = 'exact',
+                           cache: CompressionCache = None) -> dict:
+    """
+    Create a complete OPTIONS file from decompressed section files.
+
+    Args:
+        section_files: List of 3 or 4 paths to decompressed section files
+        output_file: Path to output OPTIONS file
+        platform: 'PC' or 'PS3'
+        level: LZSS compression level ('exact' reproduces the game's bytes;
+            see lzss.compress). On PS3, sections that do not fit at this
+            level are escalated to 'best' one at a time.
+        cache: Optional CompressionCache shared across calls
+
+    Returns:
+        Dictionary with statistics and validation info
+    """
+    num_sections = len(section_files)
+    if num_sections not in [3, 4]:
+        raise ValueError(f"Expected 3 or 4 section files, got {num_sections}")
+
+    results = {
+        'platform': platform,
+        'sections': [],
+        'total_compressed_size': 0,
+        'total_uncompressed_size': 0,
+        'has_section4': num_sections == 4,
+    }
+
+    section_data = pack_sections(section_files, platform, level, results, cache)
+
+    # Requested level, and what the plan ended up using per section
+    results['level'] = level
+    results['levels_used'] = sorted({section['level'] for section in results['sections']})
+
     # Build complete file based on platform
     options_data = bytearray()
 
     if platform == 'PS3':
         # PS3: 8-byte prefix (size + CRC32, big-endian)
         data_size = len(section_data)
-        crc32_value = crc32_ps3(bytes(section_data))
+        crc32_value = crc32_ps3(section_data)
 
         ps3_prefix = struct.pack('>II', data_size, crc32_value)
         options_data.extend(ps3_prefix)
@@ -480,6 +465,7 @@ Examples:
   python options_pack.py sec1.bin sec2.bin sec3.bin -o OPTIONS.bin --pc
   python options_pack.py sec1.bin sec2.bin sec3.bin sec4.bin -o OPTIONS.PS3 --ps3
   python options_pack.py sec1.bin sec2.bin sec3.bin -o OPTIONS.bin --pc --validate
+  python options_pack.py sec1.bin sec2.bin sec3.bin -o OPTIONS.bin --pc --cache-dir ~/.cache/acb-lzss
         """
     )
 
@@ -489,6 +475,10 @@ Examples:
     parser.add_argument('--ps3', action='store_true', help='Output PS3 format')
     parser.add_argument('--validate', action='store_true',
                         help='Validate by decompressing and comparing')
+    parser.add_argument('--level', choices=COMPRESSION_LEVELS, default='exact',
+                        help='Compression level (default: exact, byte-identical to the game)')
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='Reuse compressed sections across runs (content-addressed cache)')
 
     args = parser.parse_args()
 
@@ -514,9 +504,12 @@ Examples:
         section_name = SECTION_NAMES.get(i, f"Section {i}")
         print(f"  {i}. {section_name}: {sf}")
 
+    cache = CompressionCache(args.cache_dir) if args.cache_dir else None
+
     # Serialize
     try:
-        results = serialize_options_file(args.sections, args.output, platform)
+        results = serialize_options_file(args.sections, args.output, platform, args.level,
+                                         cache)
     except Exception as e:
         print(f"\nERROR: {e}")
         import traceback
@@ -529,6 +522,17 @@ Examples:
     print("=" * 70)
     print(f"\nOutput file: {args.output}")
     print(f"Platform:    {platform}")
+    escalated = {}
+    for section in results['sections']:
+        if section['level'] != results['level']:
+            escalated.setdefault(section['level'], []).append(str(section['section_num']))
+    level_note = '; '.join(f"section{'s' if len(nums) > 1 else ''} {','.join(nums)} "
+                           f"escalated to {used}" for used, nums in escalated.items())
+    print(f"LZSS level:  {results['level']}" + (f" ({level_note})" if level_note else ""))
+    print(f"LZSS time:   {sum(section['seconds'] for section in results['sections']):.2f}s")
+    if cache is not None:
+        print(f"LZSS cache:  {cache.hits + cache.disk_hits} hits, {cache.misses} misses "
+              f"({cache.directory})")
     print(f"Total size:  {results['total_size']} bytes (0x{results['total_size']:04X})")
 
     if platform == 'PS3':
@@ -555,6 +559,7 @@ Examples:
         print(f"    Compressed:   {section['compressed_size']} bytes")
         print(f"    Uncompressed: {section['uncompressed_size']} bytes")
         print(f"    Ratio:        {section['compression_ratio']:.2f}x")
+        print(f"    Level:        {section['level']} ({section['seconds']:.2f}s)")
         print(f"    Checksum:     0x{section['checksum']:08X}")
 
     # Validate if requested
@@ -30,9 +30,13 @@ Usage:
 
 import sys
 import os
+import mmap
 import struct
 import argparse
 
+# Shared modules (checksum.py, lzss.py) live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 # =============================================================================
 # CONSTANTS
@@ -66,50 +70,27 @@ PS3_FILE_SIZE = 51200
 # CHECKSUMS
 # =============================================================================
 
-def adler32_zero_seed(data: bytes) -> int:
-    """
-    Calculate Adler-32 checksum with zero seed (AC Brotherhood variant).
-
-    Standard Adler-32 uses s1=1, s2=0. This game uses s1=0, s2=0.
-    Used for validating compressed data integrity.
-    """
-    MOD_ADLER = 65521
-    s1 = 0
-    s2 = 0
-
-    for byte in data:
-        s1 = (s1 + byte) % MOD_ADLER
-        s2 = (s2 + s1) % MOD_ADLER
+from checksum import adler32_zero_seed, crc32_ps3
 
-    return (s2 << 16) | s1
 
+# =============================================================================
+# FILE INPUT
+# =============================================================================
 
-def crc32_ps3(data: bytes) -> int:
+def map_input(path: str):
     """
-    Calculate CRC32 using PS3's custom parameters.
-
-    Parameters:
-        poly=0x04C11DB7, init=0xBAE23CD0, xorout=0xFFFFFFFF
-        refin=true, refout=true
+    Map a file read-only instead of reading it into memory.
 
-    Used for validating the PS3 file prefix.
+    The returned mmap supports find(), indexing, slicing, struct.unpack_from
+    and memoryview like bytes does, and only the pages that are actually
+    touched get loaded. Files that cannot be mapped (empty files, pipes,
+    devices) are read into memory instead.
     """
-    crc = 0xBAE23CD0
-
-    for byte in data:
-        # Reflect input byte
-        byte = int('{:08b}'.format(byte)[::-1], 2)
-        crc ^= (byte << 24)
-
-        for _ in range(8):
-            if crc & 0x80000000:
-                crc = ((crc << 1) ^ 0x04C11DB7) & 0xFFFFFFFF
-            else:
-                crc = (crc << 1) & 0xFFFFFFFF
-
-    # Reflect output
-    crc = int('{:032b}'.format(crc)[::-1], 2)
-    return (crc ^ 0xFFFFFFFF) & 0xFFFFFFFF
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return f.read()
 
 
 # =============================================================================
@@ -135,7 +116,7 @@ def detect_format(data: bytes) -> str:
             prefix_size = struct.unpack('>I', data[0:4])[0]
             prefix_crc = struct.unpack('>I', data[4:8])[0]
             if prefix_size < len(data) - 8:
-                actual_crc = crc32_ps3(data[8:8 + prefix_size])
+                actual_crc = crc32_ps3(memoryview(data)[8:8 + prefix_size])
                 if actual_crc == prefix_crc:
                     return 'PS3'
 
@@ -157,134 +138,16 @@ def detect_format(data: bytes) -> str:
 # LZSS DECOMPRESSOR
 # =============================================================================
 
-class LZSSDecompressor:
-    """
-    LZSS Decompressor matching AC Brotherhood's exact format.
-    Identical between PC and PS3 versions.
-
-    Encoding types:
-    - Literal (flag=0): 8-bit byte
-    - Short match (flags=10): length 2-5, offset 1-256
-    - Long match (flags=11): length 3+, offset 0-8191
-    - Terminator: offset=0 (bytes 0x20 0x00)
-    """
-
-    def decompress(self, compressed: bytes) -> bytes:
-        """Decompress LZSS data."""
-        if not compressed:
-            return b''
-
-        output = bytearray()
-        in_ptr = 0
-        flags = 0
-        flag_bits = 0
-
-        while in_ptr < len(compressed):
-            # Read flag bit
-            if flag_bits < 1:
-                if in_ptr >= len(compressed):
-                    break
-                flags = compressed[in_ptr]
-                in_ptr += 1
-                flag_bits = 8
-
-            flag_bit = flags & 1
-            flags >>= 1
-            flag_bits -= 1
-
-            if flag_bit == 0:
-                # Literal byte
-                if in_ptr >= len(compressed):
-                    break
-                output.append(compressed[in_ptr])
-                in_ptr += 1
-            else:
-                # Match - read second flag bit
-                if flag_bits < 1:
-                    if in_ptr >= len(compressed):
-                        break
-                    flags = compressed[in_ptr]
-                    in_ptr += 1
-                    flag_bits = 8
-
-                flag_bit2 = flags & 1
-                flags >>= 1
-                flag_bits -= 1
-
-                if flag_bit2 == 0:
-                    # Short match (length 2-5, offset 1-256)
-                    if flag_bits < 2:
-                        if in_ptr >= len(compressed):
-                            break
-                        flags |= compressed[in_ptr] << flag_bits
-                        in_ptr += 1
-                        flag_bits += 8
-
-                    length = (flags & 3) + 2
-                    flags >>= 2
-                    flag_bits -= 2
-
-                    if in_ptr >= len(compressed):
-                        break
-                    offset_byte = compressed[in_ptr]
-                    in_ptr += 1
-
-                    distance = offset_byte + 1
-                    src_pos = len(output) - distance
-
-                    for _ in range(length):
-                        if src_pos < 0:
-                            output.append(0)
-                        else:
-                            output.append(output[src_pos])
-                        src_pos += 1
-                else:
-                    # Long match (length 3+, offset 0-8191)
-                    if in_ptr + 1 >= len(compressed):
-                        break
-
-                    byte1 = compressed[in_ptr]
-                    byte2 = compressed[in_ptr + 1]
-                    in_ptr += 2
-
-                    len_field = byte1 >> 5
-                    low_offset = byte1 & 0x1F
-                    high_offset = byte2
-                    distance = (high_offset << 5) | low_offset
-
-                    # Terminator check (distance == 0)
-                    if distance == 0:
-                        break
-
-                    if len_field == 0:
-                        # Variable length encoding
-                        length = 9
-                        while in_ptr < len(compressed) and compressed[in_ptr] == 0:
-                            in_ptr += 1
-                            length += 255
-                        if in_ptr >= len(compressed):
-                            break
-                        length += compressed[in_ptr]
-                        in_ptr += 1
-                    else:
-                        length = len_field + 2
-
-                    src_pos = len(output) - distance
-
-                    for _ in range(length):
-                        if src_pos < 0:
-                            output.append(0)
-                        else:
-                            output.append(output[src_pos])
-                        src_pos += 1
-
-        return bytes(output)
+from lzss import LZSSDecompressor
 
 
 # =============================================================================
 # SECTION HEADER PARSING
 # =============================================================================
 
+from header_codec import HEADER_SIZE, unpack_header
+
+
 class SectionHeader:
     """Represents a parsed section header."""
 
@@ -305,7 +168,7 @@ def find_section_headers(data: bytes, platform: str, prefix_offset: int = 0) ->
     Find and parse all section headers in the file.
 
     Args:
-        data: File data
+        data: File data (bytes or a map_input() mapping)
         platform: 'PC' or 'PS3'
         prefix_offset: Byte offset where sections start (8 for PS3, 0 for PC)
 
@@ -324,45 +187,21 @@ def find_section_headers(data: bytes, platform: str, prefix_offset: int = 0) ->
         # Header starts 0x10 bytes before the magic pattern
         header_start = pattern_pos - 0x10
 
-        if header_start < prefix_offset or header_start + 44 > len(data):
+        if header_start < prefix_offset or header_start + HEADER_SIZE > len(data):
             search_pos = pattern_pos + len(MAGIC_PATTERN)
             continue
 
-        # Parse header fields based on platform
-        if platform == 'PS3':
-            # PS3: Fields 0-2 are big-endian, fields 3-10 are little-endian
-            field0 = struct.unpack('>I', data[header_start:header_start+4])[0]
-            field1 = struct.unpack('>I', data[header_start+4:header_start+8])[0]
-            field2 = struct.unpack('>I', data[header_start+8:header_start+12])[0]
-        else:
-            # PC: All fields are little-endian
-            field0 = struct.unpack('<I', data[header_start:header_start+4])[0]
-            field1 = struct.unpack('<I', data[header_start+4:header_start+8])[0]
-            field2 = struct.unpack('<I', data[header_start+8:header_start+12])[0]
-
-        # Fields 3-10 are always little-endian
-        field3 = struct.unpack('<I', data[header_start+12:header_start+16])[0]
-
-        # After magic pattern: compressed_size, uncompressed_size, checksum
-        sizes_offset = pattern_pos + len(MAGIC_PATTERN)
-        if sizes_offset + 12 > len(data):
-            break
-
-        compressed_size = struct.unpack('<I', data[sizes_offset:sizes_offset+4])[0]
-        uncompressed_size = struct.unpack('<I', data[sizes_offset+4:sizes_offset+8])[0]
-        checksum = struct.unpack('<I', data[sizes_offset+8:sizes_offset+12])[0]
-
-        # Data starts after 44-byte header
-        data_offset = header_start + 44
+        # Whole header in one pass; PS3 fields 0-2 are big-endian
+        fields = unpack_header(data, header_start, platform)
 
         # Use field2 for section identification (Field3 in the structure)
         header = SectionHeader(
             header_offset=header_start,
-            data_offset=data_offset,
-            compressed_size=compressed_size,
-            uncompressed_size=uncompressed_size,
-            checksum=checksum,
-            field3=field2,
+            data_offset=header_start + HEADER_SIZE,
+            compressed_size=fields.compressed_size,
+            uncompressed_size=fields.uncompressed_size,
+            checksum=fields.checksum,
+            field3=fields.field2,
             platform=platform
         )
 
@@ -376,11 +215,128 @@ def find_section_headers(data: bytes, platform: str, prefix_offset: int = 0) ->
 # MAIN DECOMPRESSION LOGIC
 # =============================================================================
 
+class OptionsFile:
+    """
+    An OPTIONS file whose sections are decompressed on demand.
+
+    Section headers (and the PS3 prefix) are parsed up front. A section is
+    only decompressed and checksummed the first time it is accessed, and the
+    results are memoized, so reading one field of Section 2 does not pay for
+    the other sections. Sections are numbered from 1 in file order.
+
+    Compressed sections are memoryviews into the file data, so with
+    from_file() (which maps the file) nothing is copied until decompression.
+    """
+
+    def __init__(self, data: bytes, platform: str = None):
+        """
+        Args:
+            data: File data (bytes or a map_input() mapping)
+            platform: Optional 'PC' or 'PS3' to skip auto-detection
+
+        Raises:
+            ValueError: If the format cannot be detected
+        """
+        if platform is None:
+            platform = detect_format(data)
+            if platform == 'unknown':
+                raise ValueError("Could not detect file format (PC or PS3)")
+
+        self.data = data
+        self.view = memoryview(data)
+        self.platform = platform
+        self.prefix_offset = 8 if platform == 'PS3' else 0
+        self.headers = find_section_headers(data, platform, self.prefix_offset)
+
+        self._decompressor = LZSSDecompressor()
+        self._prefix = None
+        self._sections = {}
+        self._checksums = {}
+
+    @classmethod
+    def from_file(cls, path: str, platform: str = None) -> 'OptionsFile':
+        """Map and parse an OPTIONS file from disk."""
+        return cls(map_input(path), platform)
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+    @property
+    def prefix(self) -> dict:
+        """PS3 prefix info (size and CRC32 check), or None for PC files."""
+        if self._prefix is None and self.platform == 'PS3' and len(self.data) >= 8:
+            prefix_size, prefix_crc_expected = struct.unpack_from('>II', self.data, 0)
+            prefix_crc_actual = crc32_ps3(self.view[8:8 + prefix_size])
+            self._prefix = {
+                'data_size': prefix_size,
+                'crc32_expected': prefix_crc_expected,
+                'crc32_actual': prefix_crc_actual,
+                'valid': prefix_crc_expected == prefix_crc_actual
+            }
+        return self._prefix
+
+    def header(self, section_num: int) -> SectionHeader:
+        """Parsed header of a section (raises IndexError if missing)."""
+        if not 1 <= section_num <= len(self.headers):
+            raise IndexError(f"Section {section_num} not found")
+        return self.headers[section_num - 1]
+
+    def compressed(self, section_num: int) -> memoryview:
+        """Compressed bytes of a section, as stored in the file (a view)."""
+        header = self.header(section_num)
+        return self.view[header.data_offset:header.data_offset + header.compressed_size]
+
+    def section(self, section_num: int) -> bytes:
+        """Decompressed data of a section (decompressed on first access)."""
+        decompressed = self._sections.get(section_num)
+        if decompressed is None:
+            header = self.header(section_num)
+            compressed = self.compressed(section_num)
+            # Decompress straight into a buffer of the declared size; a stream
+            # that overruns it is decoded in full so validation() reports it
+            try:
+                decompressed = self._decompressor.decompress(compressed,
+                                                             header.uncompressed_size)
+            except ValueError:
+                decompressed = self._decompressor.decompress(compressed)
+            self._sections[section_num] = decompressed
+        return decompressed
+
+    def checksum(self, section_num: int) -> int:
+        """Adler-32 of a section's compressed bytes (computed on first access)."""
+        checksum = self._checksums.get(section_num)
+        if checksum is None:
+            checksum = adler32_zero_seed(self.compressed(section_num))
+            self._checksums[section_num] = checksum
+        return checksum
+
+    def validation(self, section_num: int) -> dict:
+        """Compare a section's header fields against its data."""
+        header = self.header(section_num)
+        compressed_size = len(self.compressed(section_num))
+        uncompressed_size = len(self.section(section_num))
+        checksum_actual = self.checksum(section_num)
+        return {
+            'compressed_size_expected': header.compressed_size,
+            'compressed_size_actual': compressed_size,
+            'compressed_size_match': compressed_size == header.compressed_size,
+            'uncompressed_size_expected': header.uncompressed_size,
+            'uncompressed_size_actual': uncompressed_size,
+            'uncompressed_size_match': uncompressed_size == header.uncompressed_size,
+            'checksum_expected': header.checksum,
+            'checksum_actual': checksum_actual,
+            'checksum_match': checksum_actual == header.checksum,
+            'field3': header.field3,
+        }
+
+
 def decompress_options_file(input_file: str, section_filter: int = None,
                             force_platform: str = None) -> dict:
     """
     Decompress an OPTIONS file (PC or PS3).
 
+    Builds on OptionsFile; only the requested section(s) are decompressed.
+
     Args:
         input_file: Path to OPTIONS file
         section_filter: Optional section number (1-4) to decompress
@@ -392,37 +348,15 @@ def decompress_options_file(input_file: str, section_filter: int = None,
     if not os.path.exists(input_file):
         return {'sections': [], 'errors': [f"File not found: {input_file}"]}
 
-    with open(input_file, 'rb') as f:
-        data = f.read()
+    try:
+        options = OptionsFile.from_file(input_file, force_platform)
+    except ValueError as e:
+        return {'sections': [], 'errors': [str(e)]}
 
-    # Detect or use forced platform
-    if force_platform:
-        platform = force_platform
-    else:
-        platform = detect_format(data)
-        if platform == 'unknown':
-            return {'sections': [], 'errors': ["Could not detect file format (PC or PS3)"]}
-
-    # Set prefix offset based on platform
-    prefix_offset = 8 if platform == 'PS3' else 0
-
-    # Parse PS3 prefix if applicable
-    prefix_info = None
-    if platform == 'PS3' and len(data) >= 8:
-        prefix_size = struct.unpack('>I', data[0:4])[0]
-        prefix_crc_expected = struct.unpack('>I', data[4:8])[0]
-        prefix_crc_actual = crc32_ps3(data[8:8 + prefix_size])
-        prefix_info = {
-            'data_size': prefix_size,
-            'crc32_expected': prefix_crc_expected,
-            'crc32_actual': prefix_crc_actual,
-            'valid': prefix_crc_expected == prefix_crc_actual
-        }
-
-    # Find section headers
-    headers = find_section_headers(data, platform, prefix_offset)
+    platform = options.platform
+    prefix_info = options.prefix
 
-    if not headers:
+    if not len(options):
         return {
             'platform': platform,
             'prefix': prefix_info,
@@ -431,54 +365,32 @@ def decompress_options_file(input_file: str, section_filter: int = None,
         }
 
     # Filter by section number if specified
+    section_nums = range(1, len(options) + 1)
     if section_filter is not None:
-        headers = [h for i, h in enumerate(headers, 1) if i == section_filter]
-        if not headers:
+        if not 1 <= section_filter <= len(options):
             return {
                 'platform': platform,
                 'prefix': prefix_info,
                 'sections': [],
                 'errors': [f"Section {section_filter} not found"]
             }
+        section_nums = [section_filter]
 
     # Decompress sections
-    decompressor = LZSSDecompressor()
     results = []
     errors = []
 
-    for section_num, header in enumerate(headers, 1):
-        if section_filter:
-            section_num = section_filter
-
+    for section_num in section_nums:
         try:
-            # Extract compressed data
-            compressed_start = header.data_offset
-            compressed_end = compressed_start + header.compressed_size
-            compressed_data = data[compressed_start:compressed_end]
-
-            # Decompress
-            decompressed = decompressor.decompress(compressed_data)
-
-            # Validate
-            validation = {
-                'compressed_size_expected': header.compressed_size,
-                'compressed_size_actual': len(compressed_data),
-                'compressed_size_match': len(compressed_data) == header.compressed_size,
-                'uncompressed_size_expected': header.uncompressed_size,
-                'uncompressed_size_actual': len(decompressed),
-                'uncompressed_size_match': len(decompressed) == header.uncompressed_size,
-                'checksum_expected': header.checksum,
-                'checksum_actual': adler32_zero_seed(compressed_data),
-                'checksum_match': adler32_zero_seed(compressed_data) == header.checksum,
-                'field3': header.field3,
-            }
+            header = options.header(section_num)
+            validation = options.validation(section_num)
 
             results.append({
                 'section_num': section_num,
                 'header_offset': header.header_offset,
                 'data_offset': header.data_offset,
-                'compressed_size': len(compressed_data),
-                'decompressed_data': decompressed,
+                'compressed_size': validation['compressed_size_actual'],
+                'decompressed_data': options.section(section_num),
                 'validation': validation,
             })
 